@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from map_loader import iter_rows, load_graph, open_graph
+from query_cache import QueryCache, result_from_search
+from search_engine import ALGORITHMS, make_search
+
+# Graph, algorithm and query cache of the current worker process, set up by _init_worker
+_graph = None
+_algorithm = 'dfs'
+_cache = None
+
+
+def query(graph, source, dest, algorithm='dfs', cache=None):
+    """Run one search and describe the result as a JSON-ready dict
+
+    With a QueryCache, repeated queries and stretches of cached shortest
+    paths are answered without searching.
+    """
+    result = {'source': source, 'destination': dest, 'algorithm': algorithm}
+    try:
+        u, v = graph.node_id(source), graph.node_id(dest)
+    except KeyError as e:
+        result['error'] = f"unknown node {e.args[0]!r}"
+        return result
+
+    start = time.perf_counter()
+    if cache is not None:
+        answer = cache.query(u, v, algorithm)
+    else:
+        search = make_search(algorithm, graph, u, v)
+        search.run()
+        answer = result_from_search(search, algorithm)
+    return describe(graph, answer, time.perf_counter() - start, result)
+
+
+def describe(graph, answer, elapsed, result=None):
+    """Add a query answer (a CachedPath) to a result dict, or a new one"""
+    if result is None:
+        result = {'source': graph.names[answer.source], 'destination': graph.names[answer.dest],
+                  'algorithm': answer.algorithm}
+    result.update(
+        found=answer.found,
+        path=[graph.names[i] for i in answer.path],
+        distance=answer.distance,
+        steps=answer.steps,
+        expanded=answer.expanded,
+        time_ms=round(elapsed * 1000, 3),
+    )
+    if answer.from_cache:
+        result['cached'] = True
+    if not answer.found and not graph.connected(answer.source, answer.dest):
+        result['reason'] = 'unreachable'
+    return result
+
+
+def _init_worker(cache_path, landmarks_path, algorithm, cache_bytes):
+    global _graph, _algorithm, _cache
+    _graph = open_graph(cache_path, landmarks_path)
+    _algorithm = algorithm
+    _cache = QueryCache(_graph, cache_bytes) if cache_bytes else None
+
+
+def _run_pair(pair):
+    return query(_graph, pair[0], pair[1], _algorithm, _cache)
+
+
+def run_batch(pairs, cache_path=None, workers=None, chunksize=64, algorithm='dfs', landmarks_path=None,
+              cache_bytes=0):
+    """Yield one result dict per (source, destination) pair, in input order
+
+    Each worker process maps the graph cache itself, so the graph is shared
+    read-only through the page cache and never pickled per task.
+    """
+    if workers == 1:
+        graph = open_graph(cache_path, landmarks_path)
+        cache = QueryCache(graph, cache_bytes) if cache_bytes else None
+        for source, dest in pairs:
+            yield query(graph, source, dest, algorithm, cache)
+        return
+
+    with Pool(workers, initializer=_init_worker, initargs=(cache_path, landmarks_path, algorithm, cache_bytes)) as pool:
+        yield from pool.imap(_run_pair, pairs, chunksize)
+
+
+def read_pairs(path, graph=None):
+    """Yield (source, destination) pairs from a file, or stdin for '-'
+
+    Given the graph, a first row naming none of its nodes is taken for a
+    header such as ``source,destination`` and skipped, as in edge files.
+    """
+    if path == '-':
+        rows = ([field.strip() for field in line.split(',')] if ',' in line else line.split() for line in sys.stdin)
+        rows = (fields for fields in rows if fields and not fields[0].startswith('#'))
+    else:
+        rows = iter_rows(path)
+    for row_no, fields in enumerate(rows, 1):
+        if len(fields) < 2:
+            continue
+        if row_no == 1 and graph is not None and not (is_node(graph, fields[0]) or is_node(graph, fields[1])):
+            continue
+        yield fields[0], fields[1]
+
+
+def is_node(graph, name):
+    """True if the graph has a node of that name"""
+    try:
+        graph.node_id(name)
+    except KeyError:
+        return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer many source,destination queries as JSON lines")
+    parser.add_argument('pairs', help="file of source,destination lines, optionally under a header row "
+                        "('-' for stdin)")
+    parser.add_argument('--cache', help="binary graph cache (default: the Romania map)")
+    parser.add_argument('--nodes', help="node file, used with --edges to build or refresh the cache")
+    parser.add_argument('--edges', help="edge file, used with --nodes")
+    parser.add_argument('--landmarks', help="landmark index directory, needed for --algorithm alt")
+    parser.add_argument('-a', '--algorithm', choices=list(ALGORITHMS), default='dfs', help="search algorithm")
+    parser.add_argument('--cache-mb', type=float, default=0,
+                        help="per-worker query cache size in MB (default: no cache)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunksize', type=int, default=64, help="pairs handed to a worker at a time")
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    cache_path = args.cache
+    if args.nodes or args.edges:
+        if not (args.nodes and args.edges):
+            parser.error("--nodes and --edges must be given together")
+        if cache_path is None:
+            cache_path = os.path.splitext(args.edges)[0] + '.rmap'
+        load_graph(args.nodes, args.edges, cache_path)
+    if args.algorithm == 'alt' and not args.landmarks:
+        parser.error("--algorithm alt needs --landmarks")
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in run_batch(read_pairs(args.pairs, open_graph(cache_path)), cache_path, args.workers,
+                                args.chunksize, args.algorithm, args.landmarks,
+                                int(args.cache_mb * 1024 * 1024)):
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{count} queries in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f}/s, "
+          f"{args.workers} workers)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
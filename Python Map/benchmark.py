@@ -0,0 +1,412 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+
+from profiler import percentile
+from road_graph import RoadGraph
+from search_engine import make_search
+
+DEFAULT_SIZES = (20, 1000, 10000, 100000, 1000000)
+QUICK_SIZES = (20, 1000, 10000)
+GRAPH_KINDS = ('grid', 'geometric', 'scalefree')
+ALGORITHMS = ('dfs', 'dijkstra', 'astar', 'bidirectional', 'lpa')
+
+# Startup budget: importing the GUI module, i.e. everything before the window exists
+STARTUP_TARGET_MS = 250
+
+# The GUI stack, and the entry points and libraries that must run without it
+GUI_MODULES = ('tkinter', 'matplotlib', 'romaniamapdfs', 'map_renderer')
+HEADLESS_MODULES = ('batch', 'benchmark', 'landmarks', 'map_loader', 'road_graph', 'search_engine',
+                    'query_cache', 'search_trace', 'profiler', 'scheduler', 'server', 'load_test')
+
+# Metrics where a smaller number is better; everything else should grow
+LOWER_IS_BETTER = ('latency_ms_p50', 'latency_ms_p95', 'peak_search_bytes',
+                   'frame_ms_p50', 'frame_ms_p95', 'first_frame_ms',
+                   'repair_ms_p50', 'full_ms_p50', 'repair_fraction')
+
+
+class NumberedNames:
+    """Node names '0', '1', ... generated on demand instead of stored"""
+
+    def __init__(self, count):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return str(i)
+
+    def __iter__(self):
+        return map(str, range(self.count))
+
+
+def _finish(n, xs, ys, edge_u, edge_v, rng):
+    # Road lengths are the straight-line distance stretched by up to 50%
+    edge_w = array('d', (math.hypot(xs[u] - xs[v], ys[u] - ys[v]) * rng.uniform(1.0, 1.5)
+                         for u, v in zip(edge_u, edge_v)))
+    return RoadGraph.from_edges(NumberedNames(n), xs, ys, edge_u, edge_v, edge_w)
+
+
+def grid_graph(n, rng):
+    """Square grid with jittered coordinates"""
+    side = max(2, int(math.isqrt(n)))
+    n = side * side
+    xs = array('d', (i % side + rng.uniform(-0.2, 0.2) for i in range(n)))
+    ys = array('d', (i // side + rng.uniform(-0.2, 0.2) for i in range(n)))
+    edge_u, edge_v = array('i'), array('i')
+    for i in range(n):
+        if i % side + 1 < side:
+            edge_u.append(i)
+            edge_v.append(i + 1)
+        if i + side < n:
+            edge_u.append(i)
+            edge_v.append(i + side)
+    return _finish(n, xs, ys, edge_u, edge_v, rng)
+
+
+def geometric_graph(n, rng, degree=6):
+    """Random geometric graph: points in the unit square joined within a radius"""
+    radius = math.sqrt(degree / (math.pi * n))
+    cells = max(1, int(1 / radius))
+    xs = array('d', (rng.random() for _ in range(n)))
+    ys = array('d', (rng.random() for _ in range(n)))
+
+    buckets = {}
+    for i in range(n):
+        buckets.setdefault((int(xs[i] * cells), int(ys[i] * cells)), []).append(i)
+
+    edge_u, edge_v = array('i'), array('i')
+    r2 = radius * radius
+    for (cx, cy), members in buckets.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                others = buckets.get((cx + dx, cy + dy))
+                if not others:
+                    continue
+                for u in members:
+                    for v in others:
+                        if u < v and (xs[u] - xs[v]) ** 2 + (ys[u] - ys[v]) ** 2 <= r2:
+                            edge_u.append(u)
+                            edge_v.append(v)
+    return _finish(n, xs, ys, edge_u, edge_v, rng)
+
+
+def scalefree_graph(n, rng, m=2):
+    """Barabasi-Albert preferential attachment graph with random coordinates"""
+    xs = array('d', (rng.random() for _ in range(n)))
+    ys = array('d', (rng.random() for _ in range(n)))
+    edge_u, edge_v = array('i'), array('i')
+    ends = array('i')
+    for u in range(1, min(m + 1, n)):
+        edge_u.append(u - 1)
+        edge_v.append(u)
+        ends.extend((u - 1, u))
+    for u in range(m + 1, n):
+        targets = set()
+        while len(targets) < m:
+            targets.add(ends[rng.randrange(len(ends))])
+        for v in targets:
+            edge_u.append(v)
+            edge_v.append(u)
+            ends.extend((u, v))
+    return _finish(n, xs, ys, edge_u, edge_v, rng)
+
+
+GENERATORS = {'grid': grid_graph, 'geometric': geometric_graph, 'scalefree': scalefree_graph}
+
+
+def connected_queries(graph, count, rng):
+    """Random query pairs of distinct nodes drawn from the component of a random node"""
+    components = graph.components()
+    start = rng.randrange(graph.num_nodes)
+    # A query from a node to itself finishes at once and would inflate throughput
+    while components.component_size(start) < 2:
+        start = rng.randrange(graph.num_nodes)
+    pairs = []
+    while len(pairs) < count:
+        dest = rng.randrange(graph.num_nodes)
+        if dest != start and components.connected(start, dest):
+            pairs.append((start, dest))
+            start = dest
+    return pairs
+
+
+def bench_search(graph, queries, algorithm):
+    """Steps per second and per-query latency of one engine"""
+    steps, elapsed, latencies = 0, 0.0, []
+    for source, dest in queries:
+        start = time.perf_counter()
+        search = make_search(algorithm, graph, source, dest)
+        search.run()
+        latency = time.perf_counter() - start
+        latencies.append(latency * 1000)
+        steps += search.step_count
+        elapsed += latency
+
+    # Peak memory of one search, with the graph already allocated
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    search = make_search(algorithm, graph, *queries[0])
+    search.run()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        'steps_per_sec': steps / elapsed if elapsed else 0.0,
+        'latency_ms_p50': statistics.median(latencies),
+        'latency_ms_p95': percentile(latencies, 95),
+        'peak_search_bytes': peak,
+    }
+
+
+def bench_repair(graph, queries):
+    """LPA* repair after closing a road on the answer, against a search from scratch
+
+    The closed road is the middle one of each query's path and is reopened
+    afterwards, so the graph is left as it was found.
+    """
+    repair_ms, full_ms, repaired, full = [], [], 0, 0
+    for source, dest in queries:
+        search = make_search('lpa', graph, source, dest)
+        search.run()
+        path = search.final_path()
+        if len(path) < 2:
+            continue
+        u, v = path[len(path) // 2 - 1], path[len(path) // 2]
+        graph.close_road(u, v)
+        try:
+            start = time.perf_counter()
+            search.road_changed(u, v)
+            search.run()
+            repair_ms.append((time.perf_counter() - start) * 1000)
+            repaired += search.repair_expanded
+
+            start = time.perf_counter()
+            fresh = make_search('lpa', graph, source, dest)
+            fresh.run()
+            full_ms.append((time.perf_counter() - start) * 1000)
+            full += fresh.visited_count
+        finally:
+            graph.reopen_road(u, v)
+
+    if not repair_ms:
+        return None
+    return {
+        'repair_ms_p50': statistics.median(repair_ms),
+        'full_ms_p50': statistics.median(full_ms),
+        'repair_fraction': repaired / max(full, 1),
+    }
+
+
+def bench_render(graph, queries, frames):
+    """Per-frame MapRenderer time on an offscreen Agg canvas"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from map_renderer import COLORS, MapRenderer
+
+    names = graph.names
+    cities = {names[u]: graph.coords(u) for u in range(graph.num_nodes)}
+    roads = [(names[u], names[v], w) for u in range(graph.num_nodes) for v, w in graph.edges(u) if u < v]
+    fig = Figure(figsize=(12, 8), dpi=100)
+    renderer = MapRenderer(fig, FigureCanvasAgg(fig), cities, roads, COLORS)
+
+    source, dest = queries[0]
+    search = make_search('dfs', graph, source, dest)
+    visited = set()
+    times = []
+    for _ in range(frames):
+        if not search.step():
+            break
+        if search.last_expanded:
+            visited.add(names[search.current])
+        path = [names[i] for i in search.path()]
+        start = time.perf_counter()
+        renderer.render(visited, names[search.current], path, [], names[source], names[dest],
+                        "benchmark", f"Step {search.step_count}")
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'first_frame_ms': times[0],
+        'frame_ms_p50': statistics.median(times[1:] or times),
+        'frame_ms_p95': percentile(times[1:] or times, 95),
+    }
+
+
+def fresh_import(code):
+    """Run code in a new interpreter next to this file and return its JSON output"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, '-c', code], cwd=here, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def check_headless_imports(modules=HEADLESS_MODULES):
+    """{module: GUI modules it pulls in} for every headless module that imports any"""
+    leaks = {}
+    for module in modules:
+        loaded = fresh_import(f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))")
+        found = [gui for gui in GUI_MODULES if gui in loaded and gui != module]
+        if found:
+            leaks[module] = found
+    return leaks
+
+
+def bench_startup(runs=5):
+    """Median time to import the GUI module in a fresh interpreter
+
+    With a display, adds the time until the window's controls exist and
+    until the deferred first map frame has been drawn.
+    """
+    runs = [fresh_import("import json, time; start = time.perf_counter(); import romaniamapdfs; "
+                         "print(json.dumps((time.perf_counter() - start) * 1000))")
+            for _ in range(runs)]
+    result = {'import_ms': statistics.median(runs)}
+    if os.environ.get('DISPLAY'):
+        window, first_map = fresh_import(
+            "import json, time; start = time.perf_counter(); import tkinter as tk, romaniamapdfs; "
+            "root = tk.Tk(); app = romaniamapdfs.RomaniaDFSTkinterApp(root); root.update_idletasks(); "
+            "window = time.perf_counter(); root.update(); "
+            "print(json.dumps(((window - start) * 1000, (time.perf_counter() - start) * 1000)))")
+        result.update(window_ms=window, first_map_ms=first_map)
+    return result
+
+
+def run_suite(sizes, kinds=GRAPH_KINDS, algorithms=ALGORITHMS, queries=5, render_max=100000, frames=30,
+              seed=0, log=print):
+    """Run every benchmark and return the list of result records"""
+    records = []
+    for kind in kinds:
+        for size in sizes:
+            rng = random.Random(seed)
+            start = time.perf_counter()
+            graph = GENERATORS[kind](size, rng)
+            build = time.perf_counter() - start
+            pairs = connected_queries(graph, queries, rng)
+            info = {'graph': kind, 'nodes': graph.num_nodes, 'edges': graph.num_edges}
+            log(f"{kind} {graph.num_nodes} nodes / {graph.num_edges} edges (built in {build:.1f}s)")
+
+            for algorithm in algorithms:
+                result = bench_search(graph, pairs, algorithm)
+                records.append(dict(info, kind='search', algorithm=algorithm, **result))
+                log(f"  {algorithm:>13}: {result['steps_per_sec']:12.0f} steps/s  "
+                    f"p50 {result['latency_ms_p50']:9.2f} ms  peak {result['peak_search_bytes'] / 1024:9.1f} KiB")
+
+            result = bench_repair(graph, pairs)
+            if result is not None:
+                records.append(dict(info, kind='repair', **result))
+                log(f"  {'repair':>13}: p50 {result['repair_ms_p50']:9.2f} ms  vs full re-search "
+                    f"{result['full_ms_p50']:9.2f} ms  ({result['repair_fraction']:.1%} of the expansions)")
+
+            if graph.num_nodes <= render_max:
+                result = bench_render(graph, pairs, frames)
+                records.append(dict(info, kind='render', **result))
+                log(f"  {'render':>13}: first {result['first_frame_ms']:.1f} ms  "
+                    f"p50 {result['frame_ms_p50']:.2f} ms  p95 {result['frame_ms_p95']:.2f} ms")
+    return records
+
+
+def record_key(record):
+    return (record['kind'], record['graph'], record['nodes'], record.get('algorithm'))
+
+
+def compare(records, baseline, threshold=0.2):
+    """Relative change of every metric against the baseline; lists regressions"""
+    old = {record_key(record): record for record in baseline}
+    changes, regressions = [], []
+    for record in records:
+        before = old.get(record_key(record))
+        if before is None:
+            continue
+        for metric, value in record.items():
+            if not isinstance(value, (int, float)) or metric in ('nodes', 'edges') or not before.get(metric):
+                continue
+            change = value / before[metric] - 1
+            worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+            entry = (record_key(record), metric, before[metric], value, change)
+            changes.append(entry)
+            if worse:
+                regressions.append(entry)
+    return changes, regressions
+
+
+def main(argv=None):
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Benchmark search throughput, latency, memory and rendering")
+    parser.add_argument('--sizes', type=int, nargs='+', help="graph sizes in nodes")
+    parser.add_argument('--quick', action='store_true', help=f"only sizes {QUICK_SIZES}")
+    parser.add_argument('--graphs', nargs='+', choices=GRAPH_KINDS, default=list(GRAPH_KINDS))
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument('--queries', type=int, default=5, help="queries per graph and algorithm")
+    parser.add_argument('--render-max', type=int, default=100000, help="largest graph to time rendering on")
+    parser.add_argument('--frames', type=int, default=30, help="frames per render benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=os.path.join(here, 'bench_results.json'),
+                        help="results file (default: next to this script)")
+    parser.add_argument('--baseline', default=os.path.join(here, 'bench_baseline.json'),
+                        help="baseline to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit with status 1 on regressions")
+    parser.add_argument('--startup', action='store_true',
+                        help=f"only time GUI startup against its {STARTUP_TARGET_MS} ms target")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        result = bench_startup()
+        print(f"GUI module import: {result['import_ms']:.0f} ms (target {STARTUP_TARGET_MS} ms)")
+        if 'window_ms' in result:
+            print(f"window with controls: {result['window_ms']:.0f} ms, "
+                  f"first map frame: {result['first_map_ms']:.0f} ms")
+        if result['import_ms'] > STARTUP_TARGET_MS:
+            sys.exit(1)
+        return
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    records = run_suite(sizes, args.graphs, args.algorithms, args.queries, args.render_max, args.frames,
+                        args.seed)
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': records,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    print(f"results -> {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline -> {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --save-baseline)")
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    changes, regressions = compare(records, baseline, args.threshold)
+    for key, metric, before, after, change in changes:
+        flag = '  REGRESSION' if (key, metric, before, after, change) in regressions else ''
+        print(f"{'/'.join(str(k) for k in key if k is not None):>32} {metric:>18}: "
+              f"{before:12.3f} -> {after:12.3f} ({change:+.1%}){flag}")
+    print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
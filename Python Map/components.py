@@ -0,0 +1,62 @@
+from array import array
+
+
+class ComponentIndex:
+    """Connected-component labels kept in a union-find forest
+
+    Built once per graph by a linear sweep over its roads; add_road() merges
+    components as roads are added, so connected() stays a near O(1) check
+    (path halving keeps the trees flat).
+    """
+
+    def __init__(self, num_nodes):
+        self.parent = array('l', range(num_nodes))
+        self.size = array('l', [1]) * num_nodes
+        self.count = num_nodes
+
+    @classmethod
+    def build(cls, graph):
+        """Label the components of every node in graph"""
+        index = cls(graph.num_nodes)
+        for u in range(graph.num_nodes):
+            for v in graph.neighbors(u):
+                if u < v:
+                    index.union(u, v)
+        # Point every node straight at its root so later lookups are one hop;
+        # find() only halves paths, so set each parent to the root outright
+        parent = index.parent
+        for u in range(graph.num_nodes):
+            parent[u] = index.find(u)
+        return index
+
+    def find(self, u):
+        """Representative node of u's component"""
+        parent = self.parent
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    def union(self, u, v):
+        """Merge the components of u and v; returns False if already joined"""
+        ru, rv = self.find(u), self.find(v)
+        if ru == rv:
+            return False
+        if self.size[ru] < self.size[rv]:
+            ru, rv = rv, ru
+        self.parent[rv] = ru
+        self.size[ru] += self.size[rv]
+        self.count -= 1
+        return True
+
+    def add_road(self, u, v):
+        """Keep the labels up to date after a road u - v is added"""
+        self.union(u, v)
+
+    def connected(self, u, v):
+        """True if some chain of roads links u and v"""
+        return self.find(u) == self.find(v)
+
+    def component_size(self, u):
+        """Number of nodes in u's component"""
+        return self.size[self.find(u)]
@@ -0,0 +1,285 @@
+import argparse
+import glob
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from multiprocessing import Pool
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import romania_data
+from map_loader import load_graph, open_graph
+from map_renderer import COLORS, MapRenderer, frame_text
+from search_engine import ALGORITHMS, make_search
+from search_trace import SearchTrace, record_search
+
+# Frame renderer of the current worker process, set up by _init_worker
+_frames = None
+
+
+class FrameRenderer:
+    """Renders any step of a recorded search offscreen with the Agg backend
+
+    Frames look like the GUI's draw_map(): the state after a step is read
+    back from the trace (visited set, current path, frontier size) and drawn
+    by the same MapRenderer.  Steps are rendered in increasing order, so the
+    visited markers keep being baked into the background instead of the map
+    being redrawn from scratch.
+
+    frame_format is 'png' (PNG file bytes), 'gif' (one encoded GIF frame
+    with its own palette) or 'rgb' (raw 8-bit RGB pixels).
+    """
+
+    def __init__(self, graph, trace, map_name, limits=None, frame_format='png', frame_ms=250,
+                 size=(12, 8), dpi=100):
+        self.trace = trace
+        self.map_name = map_name
+        self.frame_format = frame_format
+        self.frame_ms = frame_ms
+        self.names = graph.names
+        self.algorithm = ALGORITHMS[trace.algorithm].name
+
+        cities = {name: graph.coords(u) for u, name in enumerate(graph.names)}
+        roads = [(graph.names[u], graph.names[v], w)
+                 for u in range(graph.num_nodes) for v, w in graph.edges(u) if u < v]
+        self.fig = Figure(figsize=size, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.renderer = MapRenderer(self.fig, self.canvas, cities, roads, COLORS, limits=limits)
+
+    def draw(self, step):
+        """Draw the state after the given step onto the canvas"""
+        trace, names = self.trace, self.names
+        state = trace.state_at(step)
+        visited = {names[i] for i in trace.visited_at(state.step)}
+        current_city = names[state.current] if state.current >= 0 else None
+        current_path = [names[i] for i in trace.path_at(state.step)]
+        last = state.step == trace.steps
+        found = last and bool(trace.final_path)
+        completed = last and trace.completed
+        final_path = [names[i] for i in trace.final_path] if found else []
+
+        source, dest = names[trace.source], names[trace.dest]
+        title, status_info = frame_text(self.map_name, self.algorithm, source, dest, state.step, len(visited),
+                                        state.frontier, current_city, current_path, found, completed,
+                                        trace.distance)
+        self.renderer.render(visited, current_city, current_path, final_path, source, dest, title, status_info)
+
+    def render(self, step):
+        """(width, height) and the encoded frame for the given step"""
+        self.draw(step)
+        size = self.canvas.get_width_height()
+        pixels = np.asarray(self.canvas.buffer_rgba())[:, :, :3]
+        if self.frame_format == 'rgb':
+            return size, pixels.tobytes()
+
+        from PIL import Image
+        image = Image.fromarray(np.ascontiguousarray(pixels), 'RGB')
+        if self.frame_format == 'gif':
+            from PIL import GifImagePlugin
+            frame = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+            return size, b''.join(GifImagePlugin.getdata(frame, duration=self.frame_ms, include_color_table=True))
+        out = io.BytesIO()
+        image.save(out, format='PNG')
+        return size, out.getvalue()
+
+
+class PngDirectoryWriter:
+    """Writes frames as frame_00000.png, frame_00001.png, ... into a directory
+
+    Frames left in the directory by an earlier export are deleted first, so
+    a shorter run never leaves stale frames behind for a glob to pick up.
+    """
+
+    frame_format = 'png'
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.count = 0
+        os.makedirs(path, exist_ok=True)
+        for old in glob.glob(os.path.join(glob.escape(path), 'frame_*.png')):
+            os.remove(old)
+
+    def write(self, size, frame):
+        with open(os.path.join(self.path, f"frame_{self.count:05d}.png"), 'wb') as f:
+            f.write(frame)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class GifWriter:
+    """Streams pre-encoded frames into an endlessly looping GIF file"""
+
+    frame_format = 'gif'
+
+    def __init__(self, path, fps):
+        self.file = open(path, 'wb')
+        self.count = 0
+
+    def write(self, size, frame):
+        if self.count == 0:
+            from PIL import GifImagePlugin, Image
+            header, _ = GifImagePlugin.getheader(Image.new('P', size), info={'loop': 0})
+            self.file.write(b''.join(header))
+        self.file.write(frame)
+        self.count += 1
+
+    def close(self):
+        self.file.write(b';')
+        self.file.close()
+
+
+class Mp4Writer:
+    """Pipes raw frames into an ffmpeg H.264 encoder"""
+
+    frame_format = 'rgb'
+
+    def __init__(self, path, fps):
+        if shutil.which('ffmpeg') is None:
+            raise RuntimeError("MP4 export needs ffmpeg on the PATH; export to .gif or a PNG directory instead")
+        self.path = path
+        self.fps = fps
+        self.process = None
+        self.count = 0
+
+    def write(self, size, frame):
+        if self.process is None:
+            self.process = subprocess.Popen(
+                ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f"{size[0]}x{size[1]}", '-r', str(self.fps), '-i', '-',
+                 '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', '-vcodec', 'libx264', self.path],
+                stdin=subprocess.PIPE)
+        self.process.stdin.write(frame)
+        self.count += 1
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            if self.process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed writing {self.path}")
+
+
+def open_writer(path, fps):
+    """Frame writer chosen by the output path: .gif, .mp4 or a PNG directory"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gif':
+        return GifWriter(path, fps)
+    if ext == '.mp4':
+        return Mp4Writer(path, fps)
+    return PngDirectoryWriter(path, fps)
+
+
+def frame_steps(steps, every=1):
+    """Steps to render: every Nth step from 0, always ending on the last one"""
+    chosen = list(range(0, steps + 1, max(every, 1)))
+    if chosen[-1] != steps:
+        chosen.append(steps)
+    return chosen
+
+
+def _map_style(cache_path):
+    """Map name and view limits used for frames of the given graph"""
+    if cache_path is None:
+        return "🇷🇴 Romania", romania_data.LIMITS
+    return os.path.splitext(os.path.basename(cache_path))[0], None
+
+
+def _init_worker(cache_path, landmarks_path, trace_path, frame_format, frame_ms, dpi):
+    global _frames
+    # The emoji in titles fall back to boxes in the default font; say so once, not per frame
+    warnings.filterwarnings('ignore', message='Glyph .* missing from font')
+    graph = open_graph(cache_path, landmarks_path)
+    map_name, limits = _map_style(cache_path)
+    _frames = FrameRenderer(graph, SearchTrace.load(trace_path), map_name, limits, frame_format, frame_ms, dpi=dpi)
+
+
+def _render_step(step):
+    return _frames.render(step)
+
+
+def render_frames(steps, cache_path, landmarks_path, trace_path, frame_format, frame_ms=250, dpi=100,
+                  workers=None, chunksize=4):
+    """Yield (size, frame) for each step, in order
+
+    Workers each map the graph and load the trace once, then render runs of
+    chunksize consecutive steps.  Steps are handed out a window at a time,
+    so only a bounded number of finished frames ever waits in memory.
+    """
+    initargs = (cache_path, landmarks_path, trace_path, frame_format, frame_ms, dpi)
+    if workers == 1:
+        _init_worker(*initargs)
+        for step in steps:
+            yield _render_step(step)
+        return
+
+    with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        window = max(1, (workers or os.cpu_count() or 1) * chunksize * 2)
+        for start in range(0, len(steps), window):
+            yield from pool.imap(_render_step, steps[start:start + window], chunksize)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a search animation to a GIF, MP4 or PNG directory")
+    parser.add_argument('source', help="start node name")
+    parser.add_argument('destination', help="goal node name")
+    parser.add_argument('-o', '--output', required=True, help="output .gif, .mp4 or directory for PNG frames")
+    parser.add_argument('-a', '--algorithm', choices=list(ALGORITHMS), default='dfs', help="search algorithm")
+    parser.add_argument('--every', type=int, default=1, help="render every Nth step")
+    parser.add_argument('--fps', type=float, default=4, help="frames per second of the animation")
+    parser.add_argument('--dpi', type=int, default=100, help="frame resolution (12x8 inch figure)")
+    parser.add_argument('--cache', help="binary graph cache (default: the Romania map)")
+    parser.add_argument('--nodes', help="node file, used with --edges to build or refresh the cache")
+    parser.add_argument('--edges', help="edge file, used with --nodes")
+    parser.add_argument('--landmarks', help="landmark index directory, needed for --algorithm alt")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="rendering processes")
+    parser.add_argument('--chunksize', type=int, default=4, help="consecutive steps rendered per task")
+    args = parser.parse_args(argv)
+
+    cache_path = args.cache
+    if args.nodes or args.edges:
+        if not (args.nodes and args.edges):
+            parser.error("--nodes and --edges must be given together")
+        if cache_path is None:
+            cache_path = os.path.splitext(args.edges)[0] + '.rmap'
+        load_graph(args.nodes, args.edges, cache_path)
+    if args.algorithm == 'alt' and not args.landmarks:
+        parser.error("--algorithm alt needs --landmarks")
+
+    graph = open_graph(cache_path, args.landmarks)
+    try:
+        source, dest = graph.node_id(args.source), graph.node_id(args.destination)
+    except KeyError as e:
+        parser.error(f"unknown node {e.args[0]!r}")
+    try:
+        writer = open_writer(args.output, args.fps)
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    trace = record_search(make_search(args.algorithm, graph, source, dest), args.algorithm)
+    steps = frame_steps(trace.steps, args.every)
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, 'search.rtrace')
+        trace.save(trace_path)
+        try:
+            for size, frame in render_frames(steps, cache_path, args.landmarks, trace_path, writer.frame_format,
+                                             int(1000 / args.fps), args.dpi, args.workers, args.chunksize):
+                writer.write(size, frame)
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{writer.count} frames of {trace.steps} steps -> {args.output} in {elapsed:.1f}s "
+          f"({writer.count / max(elapsed, 1e-9):.1f} frames/s, {args.workers} workers)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import random
+import time
+from array import array
+from heapq import heappop, heappush
+
+import numpy as np
+
+from map_loader import open_graph
+from search_engine import INF, make_search
+
+# Landmark distances are stored as float32; bounds are loosened by this
+# relative margin so that rounding can never make them inadmissible.
+ROUNDING_MARGIN = 1e-6
+
+
+def shortest_distances(graph, source):
+    """Road distance from source to every node (inf where unreachable)"""
+    dist = array('d', [INF]) * graph.num_nodes
+    done = bytearray(graph.num_nodes)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        g, node = heappop(heap)
+        if done[node]:
+            continue
+        done[node] = 1
+        for neighbor, weight in graph.edges(node):
+            new_g = g + weight
+            if new_g < dist[neighbor]:
+                dist[neighbor] = new_g
+                heappush(heap, (new_g, neighbor))
+    return dist
+
+
+def select_landmarks(graph, k, seed=0):
+    """Pick k landmarks by farthest-point selection
+
+    Starting from the node farthest from a random start, each new landmark
+    is the reachable node farthest from all landmarks chosen so far.
+    Returns the landmark IDs and their distance rows.
+    """
+    rng = random.Random(seed)
+    start = rng.randrange(graph.num_nodes)
+    closest = np.asarray(shortest_distances(graph, start))
+
+    landmarks, rows = [], []
+    for _ in range(min(k, graph.num_nodes)):
+        finite = np.where(np.isfinite(closest), closest, -1.0)
+        landmark = int(np.argmax(finite))
+        if landmark in landmarks:
+            break
+        row = np.asarray(shortest_distances(graph, landmark))
+        landmarks.append(landmark)
+        rows.append(row)
+        closest = row if len(rows) == 1 else np.minimum(closest, row)
+    return landmarks, rows
+
+
+class LandmarkIndex:
+    """Distances from K landmarks to every node, for ALT bounds
+
+    For any landmark l the triangle inequality gives
+    |d(l, t) - d(l, v)| <= d(v, t) <= d(l, v) + d(l, t), which yields an
+    admissible A* heuristic and an upper bound on the answer.  Tables are
+    K x num_nodes float32 arrays; a saved index is memory-mapped, so rows
+    are only paged in as queries touch them.
+    """
+
+    def __init__(self, landmarks, distances, meta=None):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.meta = meta or {}
+        self._rows = None
+
+    @classmethod
+    def build(cls, graph, k=8, seed=0):
+        """Select k landmarks and compute their distance tables"""
+        landmarks, rows = select_landmarks(graph, k, seed)
+        distances = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, graph.num_nodes), np.float32)
+        meta = {'num_nodes': graph.num_nodes, 'num_edges': graph.num_edges, 'k': len(landmarks)}
+        return cls(np.asarray(landmarks, dtype=np.int32), distances, meta)
+
+    def save(self, path):
+        """Write the index as a directory of .npy files"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'landmarks.npy'), self.landmarks)
+        np.save(os.path.join(path, 'distances.npy'), self.distances)
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path, graph=None):
+        """Memory-map a saved index, checking it matches the graph if given"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if graph is not None and (meta['num_nodes'], meta['num_edges']) != (graph.num_nodes, graph.num_edges):
+            raise ValueError(f"{path}: landmark index was built for a different graph")
+        landmarks = np.load(os.path.join(path, 'landmarks.npy'))
+        distances = np.load(os.path.join(path, 'distances.npy'), mmap_mode='r')
+        return cls(landmarks, distances, meta)
+
+    def rows(self):
+        """Per-landmark distance rows as memoryviews for fast scalar access"""
+        if self._rows is None:
+            self._rows = [memoryview(np.ascontiguousarray(row)) for row in self.distances]
+        return self._rows
+
+    def heuristic(self, target):
+        """Admissible lower bound on the distance from any node to target"""
+        pairs = [(row[target], row) for row in self.rows() if row[target] != INF]
+        if not pairs:
+            return lambda u: 0.0
+        scale = 1.0 - ROUNDING_MARGIN
+
+        def h(u):
+            return scale * max([abs(to_target - row[u]) for to_target, row in pairs])
+        return h
+
+    def upper_bound(self, source, target):
+        """Length of the best source -> landmark -> target detour"""
+        rows = self.rows()
+        if not rows:
+            return INF
+        best = min(row[source] + row[target] for row in rows)
+        return best * (1.0 + ROUNDING_MARGIN)
+
+
+def random_queries(graph, count, seed=0):
+    """Reproducible random (source, destination) pairs"""
+    rng = random.Random(seed)
+    return [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)) for _ in range(count)]
+
+
+def compare(graph, queries, algorithms=('dfs', 'astar', 'alt')):
+    """Mean expanded nodes and query time per algorithm over the same queries"""
+    stats = {}
+    for algorithm in algorithms:
+        expanded, elapsed = 0, 0.0
+        for source, dest in queries:
+            start = time.perf_counter()
+            search = make_search(algorithm, graph, source, dest)
+            search.run()
+            elapsed += time.perf_counter() - start
+            expanded += search.visited_count
+        stats[algorithm] = {'expanded': expanded / len(queries), 'time_ms': elapsed * 1000 / len(queries)}
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and evaluate an ALT landmark index")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="select landmarks and save their distance tables")
+    build.add_argument('output', help="index directory to write")
+    build.add_argument('-k', '--landmarks', type=int, default=8, help="number of landmarks")
+    build.add_argument('--seed', type=int, default=0)
+
+    stats = sub.add_parser('stats', help="compare ALT against A* and DFS on random queries")
+    stats.add_argument('index', help="index directory")
+    stats.add_argument('-n', '--queries', type=int, default=200)
+    stats.add_argument('--seed', type=int, default=0)
+
+    for command in (build, stats):
+        command.add_argument('--cache', help="binary graph cache (default: the Romania map)")
+    args = parser.parse_args(argv)
+
+    graph = open_graph(args.cache)
+    if args.command == 'build':
+        start = time.perf_counter()
+        index = LandmarkIndex.build(graph, args.landmarks, args.seed)
+        index.save(args.output)
+        print(f"{len(index.landmarks)} landmarks, {index.distances.nbytes / 1e6:.1f} MB -> {args.output} "
+              f"({time.perf_counter() - start:.2f}s)")
+        return
+
+    start = time.perf_counter()
+    graph.landmark_index = LandmarkIndex.load(args.index, graph)
+    print(f"index loaded in {(time.perf_counter() - start) * 1000:.2f} ms")
+    results = compare(graph, random_queries(graph, args.queries, args.seed))
+    baseline = results['astar']
+    for algorithm, result in results.items():
+        print(f"{algorithm:>6}: {result['expanded']:10.1f} expanded  {result['time_ms']:8.3f} ms/query  "
+              f"{baseline['time_ms'] / max(result['time_ms'], 1e-9):5.2f}x vs A*")
+
+
+if __name__ == "__main__":
+    main()
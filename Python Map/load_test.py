@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+from map_loader import open_graph
+from profiler import percentile
+
+# Distinct queries the repeated share of the load is drawn from
+HOT_QUERIES = 64
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection to the routing service"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, target):
+        """(status, decoded JSON body) of a GET request, reconnecting if needed"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode('latin-1'))
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def route_target(source, dest, algorithm=None):
+    target = f"/route?from={quote(source)}&to={quote(dest)}"
+    return target + f"&algorithm={algorithm}" if algorithm else target
+
+
+async def run_load(host, port, names, concurrency, duration, repeat, algorithm=None, seed=0):
+    """Keep concurrency clients busy for duration seconds
+
+    A repeat share of the queries is drawn from a small hot set, so the
+    service's cache and coalescing get exercised; the rest are random
+    pairs.  Returns per-request latencies in seconds, the number of
+    requests completed in each whole second, and the error count.
+    """
+    rng = random.Random(seed)
+    hot = [(rng.choice(names), rng.choice(names)) for _ in range(HOT_QUERIES)]
+    latencies = []
+    per_second = [0] * max(1, int(duration))
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker():
+        nonlocal errors
+        client = Client(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                pair = rng.choice(hot) if rng.random() < repeat else (rng.choice(names), rng.choice(names))
+                sent = time.perf_counter()
+                try:
+                    status, _ = await client.get(route_target(*pair, algorithm))
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    client.close()
+                    status = None
+                done = time.perf_counter()
+                if status != 200:
+                    errors += 1
+                    continue
+                latencies.append(done - sent)
+                second = int(done - start)
+                if second < len(per_second):
+                    per_second[second] += 1
+        finally:
+            client.close()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, per_second, errors
+
+
+async def fetch_metrics(host, port):
+    client = Client(host, port)
+    try:
+        return (await client.get('/metrics'))[1]
+    finally:
+        client.close()
+
+
+async def wait_until_up(host, port, timeout=30):
+    """Poll /health until the service answers"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        client = Client(host, port)
+        try:
+            if (await client.get('/health'))[0] == 200:
+                return
+        except (ConnectionError, OSError):
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"no service on {host}:{port} after {timeout}s")
+            await asyncio.sleep(0.2)
+        finally:
+            client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the sustained throughput of the routing service")
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="address of the service")
+    parser.add_argument('--cache', help="binary graph cache the service uses, for node names "
+                        "(default: the Romania map)")
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help="simultaneous clients")
+    parser.add_argument('-d', '--duration', type=float, default=10, help="seconds of load")
+    parser.add_argument('--repeat', type=float, default=0.5,
+                        help="share of queries drawn from a small hot set (0 to 1)")
+    parser.add_argument('-a', '--algorithm', help="algorithm to ask for (default: the service's)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the query mix")
+    parser.add_argument('--start-server', action='store_true',
+                        help="start server.py on the --url port for the run, with the same --cache")
+    parser.add_argument('-j', '--workers', type=int, help="search processes of a started server")
+    parser.add_argument('-o', '--output', help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or '127.0.0.1', url.port or 80
+    names = list(open_graph(args.cache).names)
+
+    server = None
+    if args.start_server:
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+                   '--host', host, '--port', str(port)]
+        if args.cache:
+            command += ['--cache', args.cache]
+        if args.workers is not None:
+            command += ['-j', str(args.workers)]
+        server = subprocess.Popen(command)
+    try:
+        asyncio.run(wait_until_up(host, port))
+        latencies, per_second, errors = asyncio.run(
+            run_load(host, port, names, args.concurrency, args.duration, args.repeat, args.algorithm, args.seed))
+        metrics = asyncio.run(fetch_metrics(host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'qps_mean': round(len(latencies) / args.duration, 1),
+        'qps_min_second': min(per_second),
+        'qps_max_second': max(per_second),
+        'latency_ms_p50': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'latency_ms_p95': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        'latency_ms_p99': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        'cache_hit_rate': round(metrics['cache']['hit_rate'], 3),
+        'searches': metrics['searches'],
+        'coalesced': metrics['coalesced'],
+        'event_loop_lag_ms_p99': metrics['event_loop_lag_ms']['p99_ms'],
+    }
+    for name, value in report.items():
+        print(f"{name:<24}{value}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import csv
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import romania_data
+from road_graph import RoadGraph
+
+# Cache layout: header, then 8-byte aligned arrays in this order
+CACHE_MAGIC = b'RMAPCSR1'
+CACHE_HEADER = struct.Struct('<8sBxxxxxxxqqq')
+CACHE_ARRAYS = (
+    ('offsets', 'q'), ('targets', 'i'), ('weights', 'd'),
+    ('xs', 'd'), ('ys', 'd'), ('name_offsets', 'q'),
+)
+
+
+class NameTable:
+    """Read-only sequence of node names decoded on demand from a UTF-8 blob"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def iter_rows(path, delimiter=None):
+    """Yield the fields of each non-blank, non-comment line of a text file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        first = f.readline()
+        if delimiter is None:
+            delimiter = ',' if ',' in first else None
+        f.seek(0)
+
+        if delimiter is None:
+            for line in f:
+                fields = line.split()
+                if fields and not fields[0].startswith('#'):
+                    yield fields
+        else:
+            for fields in csv.reader(f, delimiter=delimiter):
+                if fields and not fields[0].startswith('#'):
+                    yield [field.strip() for field in fields]
+
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def load_csv(nodes_path, edges_path, delimiter=None):
+    """Stream a node-coordinate file and an edge-list file into a RoadGraph
+
+    Node lines are ``name,x,y`` and edge lines are ``name1,name2[,weight]``;
+    a missing weight defaults to the straight-line distance.  Either file may
+    start with a header row and may be comma or whitespace separated.
+    """
+    names = []
+    ids = {}
+    xs, ys = array('d'), array('d')
+    for line_no, fields in enumerate(iter_rows(nodes_path, delimiter), 1):
+        if len(fields) < 3:
+            raise ValueError(f"{nodes_path}:{line_no}: expected name, x, y")
+        if line_no == 1 and not _is_number(fields[1]):
+            continue
+        name = fields[0]
+        if name in ids:
+            raise ValueError(f"{nodes_path}:{line_no}: duplicate node {name!r}")
+        ids[name] = len(names)
+        names.append(name)
+        xs.append(float(fields[1]))
+        ys.append(float(fields[2]))
+
+    edge_u, edge_v, edge_w = array('i'), array('i'), array('d')
+    for line_no, fields in enumerate(iter_rows(edges_path, delimiter), 1):
+        if len(fields) < 2:
+            raise ValueError(f"{edges_path}:{line_no}: expected name1, name2[, weight]")
+        if line_no == 1 and fields[0] not in ids and fields[1] not in ids:
+            continue
+        try:
+            u, v = ids[fields[0]], ids[fields[1]]
+        except KeyError as e:
+            raise ValueError(f"{edges_path}:{line_no}: unknown node {e.args[0]!r}") from None
+        if len(fields) > 2:
+            w = float(fields[2])
+        else:
+            w = math.hypot(xs[u] - xs[v], ys[u] - ys[v])
+        edge_u.append(u)
+        edge_v.append(v)
+        edge_w.append(w)
+
+    return RoadGraph.from_edges(names, xs, ys, edge_u, edge_v, edge_w, ids)
+
+
+def save_cache(graph, path):
+    """Write the graph as a memory-mappable binary file"""
+    blob = bytearray()
+    name_offsets = array('q', [0])
+    for name in graph.names:
+        blob += name.encode('utf-8')
+        name_offsets.append(len(blob))
+
+    arrays = {
+        'offsets': graph.offsets, 'targets': graph.targets, 'weights': graph.weights,
+        'xs': graph.xs, 'ys': graph.ys, 'name_offsets': name_offsets,
+    }
+    byteorder = 0 if sys.byteorder == 'little' else 1
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, byteorder, graph.num_nodes, len(graph.targets), len(blob)))
+        for key, typecode in CACHE_ARRAYS:
+            data = arrays[key]
+            if not isinstance(data, array) or data.typecode != typecode:
+                data = array(typecode, data)
+            data.tofile(f)
+            f.write(b'\0' * (-f.tell() % 8))
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def load_cache(path):
+    """Memory-map a cache written by save_cache; nothing is parsed or copied"""
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, byteorder, num_nodes, num_slots, blob_size = CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC:
+        raise ValueError(f"{path}: not a road graph cache")
+    if byteorder != (0 if sys.byteorder == 'little' else 1):
+        raise ValueError(f"{path}: cache was written on a machine with different byte order")
+
+    lengths = {
+        'offsets': num_nodes + 1, 'targets': num_slots, 'weights': num_slots,
+        'xs': num_nodes, 'ys': num_nodes, 'name_offsets': num_nodes + 1,
+    }
+    view = memoryview(data)
+    pos = CACHE_HEADER.size
+    arrays = {}
+    for key, typecode in CACHE_ARRAYS:
+        size = lengths[key] * array(typecode).itemsize
+        arrays[key] = view[pos:pos + size].cast(typecode)
+        pos += size + (-size % 8)
+    names = NameTable(arrays['name_offsets'], view[pos:pos + blob_size])
+
+    return RoadGraph(names, arrays['xs'], arrays['ys'], arrays['offsets'], arrays['targets'], arrays['weights'],
+                     buffer=data)
+
+
+def open_graph(cache_path=None, landmarks_path=None):
+    """Memory-map a graph cache, or build the Romania map when none is given
+
+    A saved landmark index is attached when landmarks_path is given.
+    """
+    if cache_path is None:
+        graph = RoadGraph.from_roads(romania_data.CITIES, romania_data.ROADS)
+    else:
+        graph = load_cache(cache_path)
+    if landmarks_path is not None:
+        from landmarks import LandmarkIndex
+
+        graph.landmark_index = LandmarkIndex.load(landmarks_path, graph)
+    return graph
+
+
+def load_graph(nodes_path, edges_path, cache_path=None, delimiter=None):
+    """Load a road network, reusing the binary cache while it is up to date"""
+    if cache_path is None:
+        cache_path = os.path.splitext(edges_path)[0] + '.rmap'
+
+    if os.path.exists(cache_path):
+        cache_mtime = os.path.getmtime(cache_path)
+        if all(os.path.getmtime(p) <= cache_mtime for p in (nodes_path, edges_path)):
+            return load_cache(cache_path)
+
+    graph = load_csv(nodes_path, edges_path, delimiter)
+    save_cache(graph, cache_path)
+    return graph
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the binary cache for a road network")
+    parser.add_argument('nodes', help="node file with name,x,y lines")
+    parser.add_argument('edges', help="edge file with name1,name2[,weight] lines")
+    parser.add_argument('-o', '--cache', help="cache path (default: edges file with .rmap suffix)")
+    args = parser.parse_args()
+
+    cache_path = args.cache or os.path.splitext(args.edges)[0] + '.rmap'
+    start = time.perf_counter()
+    graph = load_csv(args.nodes, args.edges)
+    save_cache(graph, cache_path)
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_cache(cache_path)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} roads -> {cache_path} "
+          f"(parse {built:.2f}s, mmap load {(time.perf_counter() - start) * 1000:.1f}ms)")
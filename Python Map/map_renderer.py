@@ -0,0 +1,508 @@
+import matplotlib.patches as mpatches
+import numpy as np
+from matplotlib.collections import LineCollection
+
+from profiler import Profiler
+from spatial_index import GridIndex
+
+# Level of detail: above this many roads in view, roads and cities are drawn
+# thin and small without glow; above LABEL_LIMIT cities in view no names are
+# drawn, and paths longer than PATH_DETAIL_LIMIT get no arrows or labels
+DETAIL_LIMIT = 3000
+LABEL_LIMIT = 80
+ROAD_LABEL_LIMIT = 120
+PATH_DETAIL_LIMIT = 60
+
+# View scale change per mouse wheel notch
+ZOOM_STEP = 1.25
+
+# Color scheme
+COLORS = {
+    'source': '#ff4500', 'destination': '#9370db', 'current': '#32cd32',
+    'visited': '#ffd700', 'current_path': '#ff4444', 'final_path': '#1e90ff',
+    'cities': '#2f4f4f', 'roads': '#a9a9a9', 'background': '#f0f8ff', 'closed': '#dc143c'
+}
+
+
+def frame_text(map_name, algorithm, source, dest, step, visited, stack, current_city, current_path,
+               found, completed, distance, show_final_only=False):
+    """Title and status box text of one map frame"""
+    title = f"{map_name} Map - {algorithm} Pathfinding: {source} → {dest}"
+    if show_final_only:
+        title += " (Final Path)"
+    elif found:
+        title += " ✓ PATH FOUND"
+
+    # Enhanced status info
+    status_info = f"Step: {step} | Visited: {visited} | Stack: {stack}"
+    if current_city:
+        status_info += f"\n● Exploring: {current_city}"
+    if current_path:
+        status_info += f"\n🛣️ Current Path: {' → '.join(current_path)}"
+    if found:
+        status_info += f"\n🎉 PATH FOUND! Distance: {distance:g} km"
+    elif completed:
+        status_info += f"\n❌ NO PATH FOUND"
+    return title, status_info
+
+
+class MapRenderer:
+    """Retained-mode map renderer that only redraws what changed
+
+    Roads and cities are a handful of collections built from NumPy
+    coordinate arrays, culled to the current view with a grid index; names
+    are only drawn once few enough cities are in view.  The static map is
+    drawn once into a cached background.  Visited markers are baked into
+    that background in one scatter batch per frame (re-baked as a single
+    batch when a zoom or pan changes the level of detail or the names in
+    view), and everything else that changes per step (paths, current city,
+    start/goal markers, title and status box) is kept as animated artists
+    blitted over the background.
+    Scroll to zoom, drag to pan and double-click to show the whole map.
+    Artist updates and canvas drawing are timed as the 'layout' and 'draw'
+    phases of the given profiler.
+    """
+
+    def __init__(self, fig, canvas, cities, roads, colors, limits=None, profiler=None):
+        self.fig = fig
+        self.canvas = canvas
+        self.cities = cities
+        self.roads = roads
+        self.colors = colors
+        self.profiler = profiler or Profiler()
+        self.road_dist = {frozenset((city1, city2)): dist for city1, city2, dist in roads}
+        self.closed = []
+
+        # Coordinate arrays and spatial indexes over cities and road midpoints
+        self.names = list(cities)
+        self.node_ids = {name: i for i, name in enumerate(self.names)}
+        self.xy = np.array([cities[name] for name in self.names], dtype=float).reshape(-1, 2)
+        ends = np.array([(self.node_ids[city1], self.node_ids[city2]) for city1, city2, dist in roads],
+                        dtype=np.int64).reshape(-1, 2)
+        self.segments = self.xy[ends]
+        self.node_index = GridIndex(self.xy[:, 0], self.xy[:, 1])
+        middles = self.segments.mean(axis=1) if len(roads) else np.zeros((0, 2))
+        self.road_index = GridIndex(middles[:, 0], middles[:, 1])
+        self.road_margin = float(np.abs(self.segments[:, 1] - self.segments[:, 0]).max()) / 2 if len(roads) else 0.0
+
+        # Fit the view to the data unless fixed limits are given
+        if limits is None:
+            low = self.xy.min(axis=0) if len(self.xy) else np.zeros(2)
+            high = self.xy.max(axis=0) if len(self.xy) else np.zeros(2)
+            pad = max(float((high - low).max()), 1e-9) * 0.08
+            limits = ((low[0] - pad, high[0] + pad), (low[1] - 2 * pad, high[1] + pad))
+        self.limits = limits
+        self.view = None
+        # Vertical offset of city captions, 0.25 on the Romania map
+        self.dy = (limits[1][1] - limits[1][0]) / 30
+
+        self.ax = None
+        self.background = None
+        self.show_final_only = False
+        self.baked = []
+        self.baked_cities = set()
+        self.dynamic = []
+        self.detailed = True
+        self.show_labels = True
+        self.drag = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas.mpl_connect('button_press_event', self.on_press)
+        self.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.canvas.mpl_connect('button_release_event', self.on_release)
+
+    # Base map
+
+    def build_base(self, show_final_only):
+        """Draw the static map and create the per-step artists"""
+        self.fig.clear()
+        ax = self.fig.add_subplot(111)
+        self.ax = ax
+        self.background = None
+        self.show_final_only = show_final_only
+        self.baked = []
+        self.baked_cities = set()
+
+        ax.set_facecolor(self.colors['background'])
+        view = self.view or self.limits
+        ax.set_xlim(*view[0])
+        ax.set_ylim(*view[1])
+        ax.set_aspect('equal')
+        ax.axis('off')
+
+        # Backdrop roads and cities, filled in with what is in view by update_view()
+        self.road_glow = ax.add_collection(LineCollection([], colors='white', linewidths=7, alpha=0.2, zorder=1))
+        self.road_lines = ax.add_collection(LineCollection([], colors=self.colors['roads'], linewidths=3,
+                                                           alpha=0.4, zorder=2))
+        self.closed_lines = ax.add_collection(LineCollection(self.closed_segments(), colors=self.colors['closed'],
+                                                             linewidths=3, linestyles='dashed', zorder=2))
+        self.city_dots = ax.scatter([], [], s=100, c=self.colors['cities'], edgecolors='black',
+                                    linewidths=1.5, alpha=0.7, zorder=3)
+        self.city_labels = []
+        self.road_labels = []
+
+        self.create_legend(ax, show_final_only)
+        self.create_dynamic_artists(ax)
+        self.update_view()
+
+    def update_view(self):
+        """Cull roads, cities and names to the current view limits"""
+        detailed, show_labels = self.detailed, self.show_labels
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        m = self.road_margin
+        roads = self.road_index.query(x0 - m, x1 + m, y0 - m, y1 + m, exact=False)
+        nodes = self.node_index.query(x0, x1, y0, y1)
+
+        self.detailed = len(roads) <= DETAIL_LIMIT
+        self.road_glow.set_segments(self.segments[roads] if self.detailed else [])
+        self.road_lines.set_segments(self.segments[roads])
+        self.road_lines.set_linewidth(3 if self.detailed else 0.6)
+        self.city_dots.set_offsets(self.xy[nodes])
+        self.city_dots.set_sizes([100 if self.detailed else 4])
+        self.city_dots.set_linewidth(1.5 if self.detailed else 0)
+        for artist, width in ((self.path_glow, 10), (self.path_line, 6), (self.final_glow, 14), (self.final_line, 10)):
+            artist.set_linewidth(width if self.detailed else width / 4)
+        self.path_nodes.set_visible(self.detailed)
+        self.final_nodes.set_visible(self.detailed)
+
+        self.show_labels = len(nodes) <= LABEL_LIMIT
+        names = [(self.xy[i, 0], self.xy[i, 1] - self.dy, self.names[i]) for i in nodes] if self.show_labels else []
+        self.set_labels(self.city_labels, names,
+                        dict(fontsize=9, fontweight='normal', ha='center', va='top',
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='#666', alpha=0.8)),
+                        animated=False)
+
+        dists = []
+        if self.show_final_only and len(roads) <= ROAD_LABEL_LIMIT:
+            for i in roads:
+                (rx1, ry1), (rx2, ry2) = self.segments[i]
+                city1, city2 = self.roads[i][:2]
+                dists.append(((rx1 + rx2) / 2, (ry1 + ry2) / 2, str(self.road_dist[frozenset((city1, city2))])))
+        self.set_labels(self.road_labels, dists,
+                        dict(fontsize=9, fontweight='bold', ha='center', va='center',
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor='white',
+                                       edgecolor=self.colors['roads'], alpha=0.85)),
+                        animated=False)
+
+        # Visited markers follow the level of detail, and their names the cities in view
+        if self.baked and (self.detailed != detailed or self.show_labels or show_labels):
+            self.rebake_visited()
+
+    def closed_segments(self):
+        return [(self.cities[city1], self.cities[city2]) for city1, city2 in self.closed]
+
+    def set_closed_roads(self, roads):
+        """Mark the given (city1, city2) roads as closed from the next frame on"""
+        self.closed = list(roads)
+        if self.ax is not None:
+            self.closed_lines.set_segments(self.closed_segments())
+            # The closures are part of the static map, so the background must be redrawn
+            self.background = None
+
+    def set_road_length(self, city1, city2, dist):
+        """Show a new length for a road in path and road labels"""
+        self.road_dist[frozenset((city1, city2))] = dist
+        if self.ax is not None:
+            self.update_view()
+            self.background = None
+
+    def in_view(self, x, y):
+        """True if the point lies inside the current view limits"""
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+    def create_dynamic_artists(self, ax):
+        """Create the animated artists updated on every step"""
+        self.path_arrows = []
+        self.path_labels = []
+        self.final_arrows = []
+        self.final_labels = []
+
+        # Current exploration path
+        self.path_glow, = ax.plot([], [], '-', color='red', linewidth=10, alpha=0.3, zorder=6)
+        self.path_line, = ax.plot([], [], '-', color=self.colors['current_path'],
+                                  linewidth=6, alpha=0.9, zorder=7)
+        self.path_nodes, = ax.plot([], [], 'o', markersize=16, markerfacecolor=self.colors['current_path'],
+                                   markeredgecolor='darkred', markeredgewidth=4, zorder=8)
+
+        # Final path
+        self.final_glow, = ax.plot([], [], '-', color='white', linewidth=14, alpha=0.4, zorder=9)
+        self.final_line, = ax.plot([], [], '-', color=self.colors['final_path'],
+                                   linewidth=10, alpha=1.0, zorder=10)
+        self.final_nodes, = ax.plot([], [], 'D', markersize=14, markerfacecolor=self.colors['final_path'],
+                                    markeredgecolor='navy', markeredgewidth=4, zorder=11)
+
+        # Current city
+        self.current_halo, = ax.plot([], [], 'o', markersize=30, markerfacecolor='lime', alpha=0.4, zorder=12)
+        self.current_dot, = ax.plot([], [], 'o', markersize=20, markerfacecolor=self.colors['current'],
+                                    markeredgecolor='darkgreen', markeredgewidth=5, zorder=13)
+        self.current_text = ax.text(0, 0, 'CURRENT', fontsize=12, fontweight='bold', ha='center', va='bottom',
+                                    bbox=dict(boxstyle="round,pad=0.4", facecolor='lightgreen',
+                                              edgecolor='green', alpha=0.9),
+                                    zorder=14, visible=False)
+
+        # Source and destination
+        self.source_marker, = ax.plot([], [], '^', markersize=22, markerfacecolor=self.colors['source'],
+                                      markeredgecolor='darkred', markeredgewidth=4, zorder=15)
+        self.source_text = ax.text(0, 0, 'START', fontsize=12, fontweight='bold', ha='center', va='top',
+                                   bbox=dict(boxstyle="round,pad=0.4", facecolor='red',
+                                             edgecolor='darkred', alpha=0.9),
+                                   visible=False)
+        self.dest_marker, = ax.plot([], [], 'v', markersize=22, markerfacecolor=self.colors['destination'],
+                                    markeredgecolor='navy', markeredgewidth=4, zorder=15)
+        self.dest_text = ax.text(0, 0, 'GOAL', fontsize=12, fontweight='bold', ha='center', va='top',
+                                 bbox=dict(boxstyle="round,pad=0.4", facecolor='purple',
+                                           edgecolor='navy', alpha=0.9),
+                                 visible=False)
+
+        # Title and status box
+        self.title = ax.set_title('', fontsize=16, fontweight='bold', pad=20)
+        self.status_text = ax.text(0.02, 0.98, '', transform=ax.transAxes, fontsize=11, fontweight='bold',
+                                   verticalalignment='top',
+                                   bbox=dict(boxstyle="round,pad=0.5", facecolor='#e1ffee',
+                                             edgecolor='#2e8b57', alpha=0.95),
+                                   zorder=16)
+
+        self.dynamic = [self.path_glow, self.path_line, self.path_nodes,
+                        self.final_glow, self.final_line, self.final_nodes,
+                        self.current_halo, self.current_dot, self.current_text,
+                        self.source_marker, self.source_text, self.dest_marker, self.dest_text,
+                        self.title, self.status_text]
+        for artist in self.dynamic:
+            artist.set_animated(True)
+
+    def create_legend(self, ax, show_final_only=False):
+        """Create proper legend"""
+        if show_final_only:
+            elements = [
+                mpatches.Patch(color=self.colors['final_path'], label='Final Path'),
+                mpatches.Patch(color=self.colors['source'], label='Source City'),
+                mpatches.Patch(color=self.colors['destination'], label='Destination City'),
+            ]
+        else:
+            elements = [
+                mpatches.Patch(color=self.colors['source'], label='Source City'),
+                mpatches.Patch(color=self.colors['destination'], label='Destination City'),
+                mpatches.Patch(color=self.colors['current'], label='Current Node'),
+                mpatches.Patch(color=self.colors['visited'], label='Visited Nodes'),
+                mpatches.Patch(color=self.colors['current_path'], label='Current Path'),
+                mpatches.Patch(color=self.colors['final_path'], label='Final Path'),
+            ]
+
+        ax.legend(handles=elements, loc='lower left', framealpha=0.9, fontsize=10,
+                  bbox_to_anchor=(0.0, 0.0))
+
+    # Per-step updates
+
+    def bake_visited(self, cities):
+        """Create one batch of markers for newly visited cities"""
+        ax = self.ax
+        points = self.xy[[self.node_ids[city] for city in cities]]
+        if self.detailed:
+            artists = [
+                ax.scatter(points[:, 0], points[:, 1], s=400, c='yellow', alpha=0.3, zorder=4),
+                ax.scatter(points[:, 0], points[:, 1], s=144, marker='s', c=self.colors['visited'],
+                           edgecolors='orange', linewidths=3, zorder=5),
+            ]
+        else:
+            artists = [ax.scatter(points[:, 0], points[:, 1], s=9, marker='s', c=self.colors['visited'],
+                                  linewidths=0, zorder=5)]
+        if self.show_labels:
+            for city, (x, y) in zip(cities, points):
+                if self.in_view(x, y):
+                    artists.append(ax.text(x, y - self.dy, city, fontsize=10, fontweight='bold',
+                                           ha='center', va='top', zorder=5,
+                                           bbox=dict(boxstyle="round,pad=0.3", facecolor='yellow',
+                                                     edgecolor='orange', alpha=0.9)))
+        for artist in artists:
+            artist.set_animated(True)
+        self.baked.append(artists)
+        self.baked_cities.update(cities)
+        return artists
+
+    def rebake_visited(self):
+        """Replace the visited markers with one batch for the current view"""
+        for artists in self.baked:
+            for artist in artists:
+                artist.remove()
+        cities = list(self.baked_cities)
+        self.baked = []
+        self.baked_cities = set()
+        self.bake_visited(cities)
+
+    def set_path(self, path, line, glow, nodes, arrows, arrow_style):
+        """Point a set of path artists at the given list of cities"""
+        xs = [self.cities[city][0] for city in path]
+        ys = [self.cities[city][1] for city in path]
+        for artist in (line, glow, nodes):
+            artist.set_data(xs, ys)
+
+        if len(path) - 1 > PATH_DETAIL_LIMIT:
+            path = []
+        for i in range(len(path) - 1):
+            start, end = (xs[i], ys[i]), (xs[i + 1], ys[i + 1])
+            if i == len(arrows):
+                arrows.append(self.ax.annotate("", xy=end, xytext=start, arrowprops=arrow_style))
+                arrows[i].set_animated(True)
+                self.dynamic.append(arrows[i])
+            else:
+                arrows[i].xy = end
+                arrows[i].set_position(start)
+                arrows[i].set_visible(True)
+        for arrow in arrows[max(len(path) - 1, 0):]:
+            arrow.set_visible(False)
+
+    def set_labels(self, labels, items, style, animated=True):
+        """Show (x, y, text) items using a pool of reusable text artists"""
+        for i, (x, y, text) in enumerate(items):
+            if i == len(labels):
+                labels.append(self.ax.text(x, y, text, **style))
+                if animated:
+                    labels[i].set_animated(True)
+                    self.dynamic.append(labels[i])
+            else:
+                labels[i].set_position((x, y))
+                labels[i].set_text(text)
+                labels[i].set_visible(True)
+        for label in labels[len(items):]:
+            label.set_visible(False)
+
+    def set_marker(self, marker, text, city, dy):
+        """Move a single-city marker and its caption, or hide them"""
+        if city:
+            x, y = self.cities[city]
+            marker.set_data([x], [y])
+            text.set_position((x, y + dy))
+            text.set_visible(True)
+        else:
+            marker.set_data([], [])
+            text.set_visible(False)
+
+    def update_dynamic(self, current_city, current_path, final_path, source, dest,
+                       title, status_info, show_algorithm):
+        """Load the current search state into the animated artists"""
+        if not show_algorithm:
+            current_path = []
+        self.set_path(current_path, self.path_line, self.path_glow, self.path_nodes, self.path_arrows,
+                      dict(arrowstyle="->,head_length=0.8,head_width=0.8", lw=2, color='red', alpha=0.8))
+        road_labels = []
+        for city1, city2 in zip(current_path, current_path[1:]) if len(current_path) <= PATH_DETAIL_LIMIT else ():
+            (x1, y1), (x2, y2) = self.cities[city1], self.cities[city2]
+            road_labels.append(((x1 + x2) / 2, (y1 + y2) / 2,
+                                str(self.road_dist.get(frozenset((city1, city2)), ''))))
+        self.set_labels(self.path_labels, road_labels,
+                        dict(fontsize=9, fontweight='bold', ha='center', va='center', zorder=7,
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor='white',
+                                       edgecolor=self.colors['current_path'], alpha=0.85)))
+
+        self.set_path(final_path, self.final_line, self.final_glow, self.final_nodes, self.final_arrows,
+                      dict(arrowstyle="->,head_length=1.0,head_width=1.0", lw=3, color='blue', alpha=0.9))
+        self.set_labels(self.final_labels,
+                        [(x, y - self.dy, city) for city, (x, y) in ((city, self.cities[city]) for city in final_path)
+                         if self.in_view(x, y)][:PATH_DETAIL_LIMIT],
+                        dict(fontsize=11, fontweight='bold', ha='center', va='top', zorder=11,
+                             bbox=dict(boxstyle="round,pad=0.3", facecolor='lightblue',
+                                       edgecolor='blue', alpha=0.95)))
+
+        self.set_marker(self.current_dot, self.current_text,
+                        current_city if show_algorithm else None, 1.6 * self.dy)
+        self.current_halo.set_data(*self.current_dot.get_data())
+        self.set_marker(self.source_marker, self.source_text, source, -1.6 * self.dy)
+        self.set_marker(self.dest_marker, self.dest_text, dest, -1.6 * self.dy)
+
+        self.title.set_text(title)
+        self.status_text.set_text(status_info)
+
+    def render(self, visited, current_city, current_path, final_path, source, dest,
+               title, status_info, show_algorithm=True, show_final_only=False):
+        """Bring the canvas up to date, redrawing only the changed artists"""
+        rebuild = (self.ax is None or show_final_only != self.show_final_only
+                   or not self.baked_cities.issubset(visited))
+        with self.profiler.span('layout'):
+            if rebuild:
+                self.build_base(show_final_only)
+
+            new_visited = [self.bake_visited(list(visited - self.baked_cities))] if len(visited) > len(self.baked_cities) else []
+            self.update_dynamic(current_city, current_path, final_path, source, dest,
+                                title, status_info, show_algorithm)
+
+            if rebuild:
+                self.fig.tight_layout()
+        with self.profiler.span('draw'):
+            if rebuild or self.background is None:
+                # A full draw fires on_draw, which captures the background
+                self.canvas.draw()
+                return
+
+            self.canvas.restore_region(self.background)
+            if new_visited:
+                for artists in new_visited:
+                    for artist in artists:
+                        self.ax.draw_artist(artist)
+                self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self.draw_dynamic()
+            self.canvas.blit(self.fig.bbox)
+
+    def draw_dynamic(self):
+        """Draw the per-step artists over the restored background"""
+        for artist in sorted(self.dynamic, key=lambda a: a.get_zorder()):
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def on_draw(self, event):
+        """Recapture the background after any full redraw (e.g. a resize)"""
+        if self.ax is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        if self.baked:
+            for artists in self.baked:
+                for artist in artists:
+                    self.ax.draw_artist(artist)
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_dynamic()
+        self.canvas.blit(self.fig.bbox)
+
+    # Pan and zoom
+
+    def set_view(self, xlim, ylim):
+        """Show the given data limits and redraw"""
+        self.view = (tuple(xlim), tuple(ylim))
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.update_view()
+        self.canvas.draw_idle()
+
+    def on_scroll(self, event):
+        """Zoom in or out around the mouse position"""
+        if self.ax is None or event.inaxes is not self.ax:
+            return
+        scale = 1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        x, y = event.xdata, event.ydata
+        self.set_view((x - (x - x0) * scale, x + (x1 - x) * scale),
+                      (y - (y - y0) * scale, y + (y1 - y) * scale))
+
+    def on_press(self, event):
+        """Start a drag to pan, or show the whole map on double-click"""
+        if self.ax is None or event.inaxes is not self.ax or event.button != 1:
+            return
+        if event.dblclick:
+            self.view = None
+            self.drag = None
+            self.set_view(*self.limits)
+            return
+        self.drag = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+
+    def on_motion(self, event):
+        """Pan while dragging"""
+        if self.drag is None or event.x is None:
+            return
+        px, py, (x0, x1), (y0, y1) = self.drag
+        bbox = self.ax.bbox
+        dx = (event.x - px) * (x1 - x0) / bbox.width
+        dy = (event.y - py) * (y1 - y0) / bbox.height
+        self.set_view((x0 - dx, x1 - dx), (y0 - dy, y1 - dy))
+
+    def on_release(self, event):
+        """End a pan drag"""
+        self.drag = None
@@ -0,0 +1,146 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Durations kept per phase for the rolling percentiles
+WINDOW = 256
+
+# Most events kept for the Chrome trace; older ones are dropped first
+MAX_EVENTS = 200000
+
+# Search counters, in the order the overlay lists them
+COUNTERS = ('pushes', 'pops', 'revisits', 'peak_stack')
+
+_NULL_SPAN = nullcontext()
+
+
+def percentile(values, q):
+    """q-th percentile of a non-empty list"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+
+
+class Profiler:
+    """Timing spans and search counters for finding where the time goes
+
+    Phases are timed with span(name) blocks, or add(name, start, end) where
+    the caller already read the clock.  Each phase keeps its last WINDOW
+    durations for rolling p50/p95 figures, and every span and counter
+    snapshot is also kept as an event for save_chrome_trace(), which writes
+    a file for chrome://tracing or Perfetto.
+
+    While disabled, span() hands back a shared no-op context manager and
+    callers are expected to test enabled before anything else, so leaving
+    the hooks in place costs an attribute lookup.
+    """
+
+    def __init__(self, enabled=False, window=WINDOW, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.window = window
+        self.events = deque(maxlen=max_events)
+        self.reset()
+
+    def reset(self):
+        """Forget all timings, counters and events"""
+        self.origin = time.perf_counter()
+        self.durations = {}
+        self.totals = {}
+        self.reset_counters()
+        self.events.clear()
+
+    def reset_counters(self):
+        """Zero the search counters, e.g. when a new search starts"""
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def span(self, name):
+        """Context manager timing one occurrence of a phase"""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def add(self, name, start, end):
+        """Record a phase that ran from start to end (perf_counter seconds)"""
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations[name] = deque(maxlen=self.window)
+            self.totals[name] = [0, 0.0]
+        durations.append(end - start)
+        total = self.totals[name]
+        total[0] += 1
+        total[1] += end - start
+        self.events.append((name, start, end))
+
+    def count_step(self, search, frontier_before, settled_before):
+        """Update the search counters after one engine step
+
+        frontier_before and settled_before are the engine's frontier_size()
+        and visited_count just before the step.  An expanded node pops one
+        entry and pushes the growth of the frontier; a step that expands
+        nothing either skips a stale entry (a re-visit), pops the goal, or
+        is the final meeting step of a bidirectional search, which pops
+        nothing.
+        """
+        counters = self.counters
+        frontier = search.frontier_size()
+        if search.visited_count > settled_before:
+            counters['pops'] += 1
+            counters['pushes'] += frontier - frontier_before + 1
+        else:
+            popped = frontier_before - frontier
+            counters['pops'] += popped
+            if popped and not search.found:
+                counters['revisits'] += 1
+        if frontier > counters['peak_stack']:
+            counters['peak_stack'] = frontier
+
+    def snapshot(self):
+        """Add the current counter values to the event log"""
+        self.events.append(('counters', time.perf_counter(), dict(self.counters)))
+
+    def stats(self):
+        """{phase: (count, p50 seconds, p95 seconds, mean seconds)} over the rolling window"""
+        return {name: (self.totals[name][0], percentile(durations, 50), percentile(durations, 95),
+                       self.totals[name][1] / self.totals[name][0])
+                for name, durations in self.durations.items()}
+
+    def summary(self):
+        """Fixed-width text table of the phase timings and the counters"""
+        lines = [f"{'phase':<12}{'count':>9}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"]
+        for name, (count, p50, p95, mean) in sorted(self.stats().items()):
+            lines.append(f"{name:<12}{count:>9}{p50 * 1000:>10.3f}{p95 * 1000:>10.3f}{mean * 1000:>10.3f}")
+        lines.append("  ".join(f"{name}: {self.counters[name]}" for name in COUNTERS))
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """The recorded events in Chrome's trace event format"""
+        pid = os.getpid()
+        origin = self.origin
+        events = []
+        for name, start, end in self.events:
+            if name == 'counters':
+                events.append({'name': 'search', 'ph': 'C', 'ts': (start - origin) * 1e6, 'pid': pid,
+                               'tid': 0, 'args': end})
+            else:
+                events.append({'name': name, 'cat': 'app', 'ph': 'X', 'ts': (start - origin) * 1e6,
+                               'dur': (end - start) * 1e6, 'pid': pid, 'tid': 0})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        """Write the events as a Chrome trace JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
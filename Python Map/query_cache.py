@@ -0,0 +1,227 @@
+from array import array
+from collections import OrderedDict
+
+from search_engine import check_algorithm, make_search
+
+# Algorithms whose paths are shortest paths, so any stretch of a cached
+# path is itself the shortest path between its ends
+OPTIMAL_ALGORITHMS = frozenset(('dijkstra', 'astar', 'bidirectional', 'alt', 'lpa'))
+
+# Rough per-entry bookkeeping cost used for the memory cap, in bytes
+ENTRY_OVERHEAD = 400
+BYTES_PER_PATH_NODE = 16 + 80
+
+
+class CachedPath:
+    """Answer to one path query, as stored in or served from the cache"""
+
+    __slots__ = ('source', 'dest', 'algorithm', 'found', 'path', 'distance',
+                 'steps', 'expanded', 'from_cache')
+
+    def __init__(self, source, dest, algorithm, found, path, distance, steps=None, expanded=None):
+        self.source = source
+        self.dest = dest
+        self.algorithm = algorithm
+        self.found = found
+        self.path = path
+        self.distance = distance
+        self.steps = steps
+        self.expanded = expanded
+        self.from_cache = False
+
+    def served_from_cache(self, path=None, distance=None):
+        """Copy marked as a cache answer, optionally for a stretch of the path"""
+        copy = CachedPath(self.source, self.dest, self.algorithm, self.found,
+                          self.path if path is None else path,
+                          self.distance if distance is None else distance,
+                          self.steps if path is None else None,
+                          self.expanded if path is None else None)
+        copy.from_cache = True
+        return copy
+
+
+class _Entry:
+    __slots__ = ('result', 'path', 'prefix', 'size')
+
+    def __init__(self, result, path, prefix):
+        self.result = result
+        self.path = path
+        self.prefix = prefix
+        self.size = ENTRY_OVERHEAD + BYTES_PER_PATH_NODE * len(path)
+
+
+class QueryCache:
+    """Bounded LRU cache of path queries on one graph
+
+    Entries are keyed by (source, destination, algorithm, graph version).
+    Paths from optimal algorithms are also indexed by node, so a query by
+    the same algorithm between any two nodes on a cached shortest path is
+    answered from it.
+    The cache listens for graph edits: a road that gets longer or closed
+    only drops the shortest paths that use it, while anything that could
+    make some path shorter (or change DFS order) drops every entry.
+    """
+
+    def __init__(self, graph, max_bytes=64 * 1024 * 1024):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.by_node = {}
+        self.bytes = 0
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        graph.listeners.append(self.on_graph_edit)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """Counters describing cache effectiveness"""
+        lookups = self.hits + self.subpath_hits + self.misses
+        return {
+            'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+            'hits': self.hits, 'subpath_hits': self.subpath_hits, 'misses': self.misses,
+            'invalidated': self.invalidated,
+            'hit_rate': (self.hits + self.subpath_hits) / lookups if lookups else 0.0,
+        }
+
+    def lookup(self, source, dest, algorithm):
+        """Cached answer for the query, or None"""
+        key = (source, dest, algorithm, self.graph.version)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry.result.served_from_cache()
+
+        if algorithm in OPTIMAL_ALGORITHMS:
+            result = self.lookup_subpath(source, dest, algorithm)
+            if result is not None:
+                self.subpath_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def lookup_subpath(self, source, dest, algorithm):
+        """Answer from a cached shortest path of the same algorithm that passes both nodes"""
+        with_source = self.by_node.get(source)
+        with_dest = self.by_node.get(dest)
+        if not with_source or not with_dest:
+            return None
+        for base in with_source & with_dest:
+            if base[2] != algorithm:
+                continue
+            key = base + (self.graph.version,)
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+            self.entries.move_to_end(key)
+            path = entry.path.tolist()
+            i, j = path.index(source), path.index(dest)
+            distance = abs(entry.prefix[j] - entry.prefix[i])
+            segment = path[i:j + 1] if i <= j else path[j:i + 1][::-1]
+            result = entry.result.served_from_cache(segment, distance)
+            result.source, result.dest, result.algorithm = source, dest, algorithm
+            return result
+        return None
+
+    def store(self, result):
+        """Add a finished query result, evicting least recently used entries"""
+        key = (result.source, result.dest, result.algorithm, self.graph.version)
+        if key in self.entries:
+            self.remove(key)
+
+        path = array('l', result.path)
+        prefix = array('d', [0.0])
+        if result.found and result.algorithm in OPTIMAL_ALGORITHMS:
+            for u, v in zip(result.path, result.path[1:]):
+                prefix.append(prefix[-1] + self.graph.edge_weight(u, v))
+            base = key[:3]
+            for node in result.path:
+                self.by_node.setdefault(node, set()).add(base)
+
+        entry = _Entry(result, path, prefix)
+        if entry.size > self.max_bytes:
+            self.forget_nodes(key, path)
+            return
+        self.entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        """Drop one entry"""
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+        self.forget_nodes(key, entry.path)
+
+    def forget_nodes(self, key, path):
+        """Remove an entry from the per-node subpath index"""
+        base = key[:3]
+        for node in path:
+            keys = self.by_node.get(node)
+            if keys is not None:
+                keys.discard(base)
+                if not keys:
+                    del self.by_node[node]
+
+    def clear(self):
+        """Drop every entry"""
+        self.invalidated += len(self.entries)
+        self.entries.clear()
+        self.by_node.clear()
+        self.bytes = 0
+
+    def on_graph_edit(self, graph, u, v, lengthened):
+        """Invalidate the entries an edit of road u - v can affect"""
+        if not lengthened:
+            self.clear()
+            return
+
+        old_version = graph.version - 1
+        kept = OrderedDict()
+        for key, entry in self.entries.items():
+            source, dest, algorithm, version = key
+            result = entry.result
+            if version != old_version or algorithm not in OPTIMAL_ALGORITHMS or not result.found \
+                    or uses_road(entry.path, u, v):
+                self.bytes -= entry.size
+                self.forget_nodes(key, entry.path)
+                self.invalidated += 1
+            else:
+                kept[(source, dest, algorithm, graph.version)] = entry
+        self.entries = kept
+
+    def query(self, source, dest, algorithm='dfs'):
+        """Answer a query from the cache, running and storing a search on a miss
+
+        Raises ValueError for an algorithm that cannot run on the graph,
+        whether or not the answer is cached.
+        """
+        check_algorithm(self.graph, algorithm)
+        result = self.lookup(source, dest, algorithm)
+        if result is not None:
+            return result
+
+        search = make_search(algorithm, self.graph, source, dest)
+        search.run()
+        result = result_from_search(search, algorithm)
+        self.store(result)
+        return result
+
+
+def uses_road(path, u, v):
+    """True if the path travels the road between u and v"""
+    for a, b in zip(path, path[1:]):
+        if (a == u and b == v) or (a == v and b == u):
+            return True
+    return False
+
+
+def result_from_search(search, algorithm):
+    """CachedPath describing a finished search engine run"""
+    return CachedPath(search.source, search.dest, algorithm, search.found, search.final_path(),
+                      search.distance() if search.found else None, search.step_count, search.visited_count)
@@ -0,0 +1,296 @@
+import math
+from array import array
+
+from components import ComponentIndex
+
+INF = math.inf
+
+
+class RoadGraph:
+    """Undirected road network stored as compressed sparse row (CSR) arrays
+
+    Nodes are integer IDs 0..num_nodes-1.  The neighbors of node u are
+    targets[offsets[u]:offsets[u + 1]] with matching entries in weights, so
+    a road is stored once in each direction and a neighbor scan is a slice.
+    Neighbors keep the order in which their roads were added, which is the
+    order DFS pushes them in.  Roads added after construction live in a
+    small per-node overlay that is appended to the CSR slice; closed roads
+    are kept in another overlay and filtered out of neighbor scans until
+    they are reopened.  Every edit bumps version and calls each of listeners
+    with (graph, u, v, lengthened), where lengthened is True if no distance
+    can have become shorter.
+
+    ids is an optional prebuilt {name: ID} map, otherwise built on first
+    use; buffer is whatever owns the memory the arrays view, such as the
+    mmap of a cache file, kept open for as long as the graph lives.
+    """
+
+    def __init__(self, names, xs, ys, offsets, targets, weights, ids=None, buffer=None):
+        self.names = names
+        self.xs = xs
+        self.ys = ys
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.num_nodes = len(offsets) - 1
+        self.landmark_index = None
+        self.version = 0
+        self.listeners = []
+        self._added = {}
+        self._num_added = 0
+        self._closed = {}
+        self._components = None
+        self._ids = ids
+        self._buffer = buffer
+        self._heuristic_scale = None
+
+    @classmethod
+    def from_edges(cls, names, xs, ys, edge_u, edge_v, edge_w, ids=None):
+        """Build the CSR arrays from parallel edge arrays"""
+        num_nodes = len(names)
+        degree = array('q', [0]) * (num_nodes + 1)
+        for u in edge_u:
+            degree[u + 1] += 1
+        for v in edge_v:
+            degree[v + 1] += 1
+
+        # Prefix sums turn the degrees into offsets
+        offsets = degree
+        for i in range(num_nodes):
+            offsets[i + 1] += offsets[i]
+
+        fill = array('q', offsets[:-1])
+        targets = array('i', [0]) * offsets[-1]
+        weights = array('d', [0.0]) * offsets[-1]
+        for u, v, w in zip(edge_u, edge_v, edge_w):
+            slot = fill[u]
+            targets[slot] = v
+            weights[slot] = w
+            fill[u] = slot + 1
+            slot = fill[v]
+            targets[slot] = u
+            weights[slot] = w
+            fill[v] = slot + 1
+
+        return cls(names, xs, ys, offsets, targets, weights, ids)
+
+    @classmethod
+    def from_roads(cls, cities, roads):
+        """Build a graph from a {name: (x, y)} dict and (city1, city2, dist) roads"""
+        names = list(cities.keys())
+        ids = {city: i for i, city in enumerate(names)}
+        xs = array('d', (cities[city][0] for city in names))
+        ys = array('d', (cities[city][1] for city in names))
+
+        # Skip repeated roads so each pair is stored once per direction
+        seen = set()
+        edge_u, edge_v, edge_w = array('i'), array('i'), array('d')
+        for city1, city2, dist in roads:
+            u, v = ids[city1], ids[city2]
+            if (u, v) in seen or (v, u) in seen:
+                continue
+            seen.add((u, v))
+            edge_u.append(u)
+            edge_v.append(v)
+            edge_w.append(dist)
+
+        return cls.from_edges(names, xs, ys, edge_u, edge_v, edge_w, ids)
+
+    @property
+    def num_edges(self):
+        """Number of undirected roads"""
+        return len(self.targets) // 2 + self._num_added
+
+    def node_id(self, name):
+        """Integer ID of the named node"""
+        if self._ids is None:
+            self._ids = {city: i for i, city in enumerate(self.names)}
+        return self._ids[name]
+
+    def coords(self, u):
+        """(x, y) position of node u"""
+        return self.xs[u], self.ys[u]
+
+    def neighbors(self, u):
+        """Neighbor IDs of node u over open roads, in insertion order"""
+        neighbors = self.targets[self.offsets[u]:self.offsets[u + 1]]
+        if self._added and u in self._added:
+            neighbors = list(neighbors) + [v for v, w in self._added[u]]
+        if self._closed and u in self._closed:
+            closed = self._closed[u]
+            return [v for v in neighbors if v not in closed]
+        return neighbors
+
+    def edges(self, u):
+        """(neighbor, weight) pairs of node u over open roads"""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        edges = zip(self.targets[lo:hi], self.weights[lo:hi])
+        if self._added and u in self._added:
+            edges = list(edges) + self._added[u]
+        if self._closed and u in self._closed:
+            closed = self._closed[u]
+            return [(v, w) for v, w in edges if v not in closed]
+        return edges
+
+    def edge_slot(self, u, v):
+        """CSR slot of the road u -> v, or -1 if there is none or it was added later"""
+        lo, hi = self.offsets[u], self.offsets[u + 1]
+        for slot, target in enumerate(self.targets[lo:hi], lo):
+            if target == v:
+                return slot
+        return -1
+
+    def _road_slot(self, u, v):
+        """CSR slot of the road u - v, searched from the end with fewer neighbors"""
+        offsets = self.offsets
+        if offsets[v + 1] - offsets[v] < offsets[u + 1] - offsets[u]:
+            return self.edge_slot(v, u)
+        return self.edge_slot(u, v)
+
+    def has_road(self, u, v):
+        """True if a road, open or closed, links u and v"""
+        return self._road_slot(u, v) >= 0 or any(n == v for n, w in self._added.get(u, ()))
+
+    def is_closed(self, u, v):
+        """True if the road between u and v is closed"""
+        return v in self._closed.get(u, ())
+
+    def closed_roads(self):
+        """(u, v) pairs, u < v, of every closed road"""
+        return [(u, v) for u, closed in self._closed.items() for v in closed if u < v]
+
+    def edge_weight(self, u, v):
+        """Length of the road between u and v, also while it is closed"""
+        slot = self._road_slot(u, v)
+        if slot < 0:
+            for neighbor, weight in self._added.get(u, ()):
+                if neighbor == v:
+                    return weight
+            raise KeyError((u, v))
+        return self.weights[slot]
+
+    def path_distance(self, path):
+        """Total length of a path given as a list of node IDs"""
+        return sum(self.edge_weight(u, v) for u, v in zip(path, path[1:]))
+
+    def add_road(self, u, v, weight):
+        """Add a road between u and v after construction"""
+        if u == v or self.has_road(u, v):
+            raise ValueError(f"road {self.names[u]} - {self.names[v]} already exists or is a loop")
+        self._added.setdefault(u, []).append((v, weight))
+        self._added.setdefault(v, []).append((u, weight))
+        self._num_added += 1
+
+        if self._components is not None:
+            self._components.add_road(u, v)
+        self._heuristic_scale = None
+        # A new road can shorten distances, so landmark bounds are no longer safe
+        self.landmark_index = None
+        self._edited(u, v, lengthened=False)
+
+    def _check_road(self, u, v):
+        if not self.has_road(u, v):
+            raise ValueError(f"there is no road {self.names[u]} - {self.names[v]}")
+
+    def close_road(self, u, v):
+        """Take the road between u and v out of use until reopen_road()"""
+        self._check_road(u, v)
+        if self.is_closed(u, v):
+            raise ValueError(f"road {self.names[u]} - {self.names[v]} is already closed")
+        self._closed.setdefault(u, set()).add(v)
+        self._closed.setdefault(v, set()).add(u)
+
+        # Union-find cannot split a component, so relabel on the next query
+        self._components = None
+        # Landmark distances no longer match the roads, so ALT's bounds are unsafe
+        self.landmark_index = None
+        self._edited(u, v, lengthened=True)
+
+    def reopen_road(self, u, v):
+        """Put a closed road back into use"""
+        self._check_road(u, v)
+        if not self.is_closed(u, v):
+            raise ValueError(f"road {self.names[u]} - {self.names[v]} is not closed")
+        for a, b in ((u, v), (v, u)):
+            self._closed[a].discard(b)
+            if not self._closed[a]:
+                del self._closed[a]
+
+        if self._components is not None:
+            self._components.add_road(u, v)
+        self.landmark_index = None
+        self._edited(u, v, lengthened=False)
+
+    def set_road_length(self, u, v, weight):
+        """Change the length of the road between u and v"""
+        self._check_road(u, v)
+        if not weight >= 0:
+            raise ValueError(f"road length must be a non-negative number, not {weight!r}")
+        old = self.edge_weight(u, v)
+        slot = self.edge_slot(u, v)
+        if slot >= 0:
+            if not isinstance(self.weights, array):
+                # Weights mapped from a cache file are read-only; edit a private copy
+                self.weights = array('d', self.weights)
+            self.weights[slot] = weight
+            self.weights[self.edge_slot(v, u)] = weight
+        else:
+            for a, b in ((u, v), (v, u)):
+                self._added[a] = [(n, weight if n == b else w) for n, w in self._added[a]]
+
+        if weight < old:
+            self._heuristic_scale = None
+        self.landmark_index = None
+        self._edited(u, v, lengthened=weight >= old)
+
+    def _edited(self, u, v, lengthened):
+        self.version += 1
+        for listener in self.listeners:
+            listener(self, u, v, lengthened)
+
+    def components(self):
+        """Connected-component index, built on first use"""
+        if self._components is None:
+            self._components = ComponentIndex.build(self)
+        return self._components
+
+    def connected(self, u, v):
+        """True if some chain of roads links u and v"""
+        return self.components().connected(u, v)
+
+    def heuristic_scale(self):
+        """Smallest ratio of road length to straight-line distance
+
+        Straight-line distance times this ratio is a lower bound on the road
+        distance between any two nodes.
+        """
+        if self._heuristic_scale is None:
+            scale = INF
+            xs, ys, targets, weights, offsets = self.xs, self.ys, self.targets, self.weights, self.offsets
+            for u in range(self.num_nodes):
+                x, y = xs[u], ys[u]
+                for slot in range(offsets[u], offsets[u + 1]):
+                    v = targets[slot]
+                    straight = math.hypot(xs[v] - x, ys[v] - y)
+                    if straight > 0:
+                        scale = min(scale, weights[slot] / straight)
+            for u, added in self._added.items():
+                for v, w in added:
+                    straight = math.hypot(xs[v] - xs[u], ys[v] - ys[u])
+                    if straight > 0:
+                        scale = min(scale, w / straight)
+            self._heuristic_scale = 0.0 if scale == INF else scale
+        return self._heuristic_scale
+
+    def to_networkx(self):
+        """Export as a networkx.Graph (networkx is only needed for this)"""
+        import networkx as nx
+
+        graph = nx.Graph()
+        for u, name in enumerate(self.names):
+            graph.add_node(name, pos=self.coords(u))
+        for u in range(self.num_nodes):
+            for v, w in self.edges(u):
+                if u < v:
+                    graph.add_edge(self.names[u], self.names[v], weight=w)
+        return graph
@@ -0,0 +1,28 @@
+# Romania cities data
+CITIES = {
+    'Arad': (1.2, 5.8), 'Bucharest': (8.5, 3.2), 'Craiova': (6.2, 2.5),
+    'Drobeta': (4.5, 3.0), 'Eforie': (10.5, 2.0), 'Fagaras': (6.8, 5.0),
+    'Giurgiu': (8.0, 2.0), 'Hirsova': (10.0, 3.5), 'Iasi': (9.5, 7.0),
+    'Lugoj': (3.5, 4.0), 'Mehadia': (4.0, 3.3), 'Neamt': (8.0, 7.5),
+    'Oradea': (2.5, 6.5), 'Pitesti': (7.2, 3.8), 'Rimnicu Vilcea': (5.8, 4.5),
+    'Sibiu': (5.0, 5.2), 'Timisoara': (2.5, 4.5), 'Urziceni': (9.0, 3.8),
+    'Vaslui': (9.2, 6.0), 'Zerind': (2.0, 6.0)
+}
+
+# Road connections
+ROADS = [
+    ('Arad', 'Zerind', 75), ('Arad', 'Sibiu', 140), ('Arad', 'Timisoara', 118),
+    ('Zerind', 'Oradea', 71), ('Oradea', 'Sibiu', 151),
+    ('Timisoara', 'Lugoj', 111), ('Lugoj', 'Mehadia', 70), 
+    ('Mehadia', 'Drobeta', 75), ('Drobeta', 'Craiova', 120),
+    ('Craiova', 'Rimnicu Vilcea', 146), ('Craiova', 'Pitesti', 138),
+    ('Sibiu', 'Fagaras', 99), ('Sibiu', 'Rimnicu Vilcea', 80),
+    ('Rimnicu Vilcea', 'Pitesti', 97), ('Fagaras', 'Bucharest', 211),
+    ('Pitesti', 'Bucharest', 101), ('Bucharest', 'Giurgiu', 90),
+    ('Bucharest', 'Urziceni', 85), ('Urziceni', 'Hirsova', 98),
+    ('Urziceni', 'Vaslui', 142), ('Hirsova', 'Eforie', 86),
+    ('Vaslui', 'Iasi', 92), ('Iasi', 'Neamt', 87)
+]
+
+# View limits that frame the map and its captions
+LIMITS = ((0.5, 11.5), (1.0, 8.5))
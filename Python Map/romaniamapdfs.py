@@ -1,56 +1,53 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import networkx as nx
-import matplotlib.patches as mpatches
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import math
+import os
 import time
-import threading
+from search_engine import ALGORITHMS, available_algorithms, make_search
+from road_graph import RoadGraph
+from map_loader import load_cache, load_graph
+from query_cache import QueryCache, result_from_search
+import romania_data
+from profiler import Profiler
+from scheduler import FrameScheduler
+from search_trace import SearchTrace
+
+# Seconds between refreshes of the profile panel
+PROFILE_INTERVAL = 0.25
 
 class RomaniaDFSTkinterApp:
-    def __init__(self, root):
+    def __init__(self, root, graph=None, map_name="🇷🇴 Romania", landmarks_path=None, profile=False):
         self.root = root
-        self.root.title("🇷🇴 Romania DFS Pathfinder")
+        self.root.title(f"{map_name} Pathfinder")
         self.root.geometry("1400x900")
         
-        # Romania cities data
-        self.cities = {
-            'Arad': (1.2, 5.8), 'Bucharest': (8.5, 3.2), 'Craiova': (6.2, 2.5),
-            'Drobeta': (4.5, 3.0), 'Eforie': (10.5, 2.0), 'Fagaras': (6.8, 5.0),
-            'Giurgiu': (8.0, 2.0), 'Hirsova': (10.0, 3.5), 'Iasi': (9.5, 7.0),
-            'Lugoj': (3.5, 4.0), 'Mehadia': (4.0, 3.3), 'Neamt': (8.0, 7.5),
-            'Oradea': (2.5, 6.5), 'Pitesti': (7.2, 3.8), 'Rimnicu Vilcea': (5.8, 4.5),
-            'Sibiu': (5.0, 5.2), 'Timisoara': (2.5, 4.5), 'Urziceni': (9.0, 3.8),
-            'Vaslui': (9.2, 6.0), 'Zerind': (2.0, 6.0)
-        }
-
-        # Road connections
-        self.roads = [
-            ('Arad', 'Zerind', 75), ('Arad', 'Sibiu', 140), ('Arad', 'Timisoara', 118),
-            ('Zerind', 'Oradea', 71), ('Oradea', 'Sibiu', 151),
-            ('Timisoara', 'Lugoj', 111), ('Lugoj', 'Mehadia', 70), 
-            ('Mehadia', 'Drobeta', 75), ('Drobeta', 'Craiova', 120),
-            ('Craiova', 'Rimnicu Vilcea', 146), ('Craiova', 'Pitesti', 138),
-            ('Sibiu', 'Fagaras', 99), ('Sibiu', 'Rimnicu Vilcea', 80),
-            ('Rimnicu Vilcea', 'Pitesti', 97), ('Fagaras', 'Bucharest', 211),
-            ('Pitesti', 'Bucharest', 101), ('Bucharest', 'Giurgiu', 90),
-            ('Bucharest', 'Urziceni', 85), ('Urziceni', 'Hirsova', 98),
-            ('Urziceni', 'Vaslui', 142), ('Hirsova', 'Eforie', 86),
-            ('Vaslui', 'Iasi', 92), ('Iasi', 'Neamt', 87)
-        ]
-
-        # Build graph
-        self.graph = nx.Graph()
-        for city1, city2, dist in self.roads:
-            self.graph.add_edge(city1, city2, weight=dist)
+        if graph is None:
+            # Romania cities data
+            self.cities = dict(romania_data.CITIES)
+
+            # Road connections
+            self.roads = list(romania_data.ROADS)
+            graph = RoadGraph.from_roads(self.cities, self.roads)
+            self.map_limits = romania_data.LIMITS
+        else:
+            # Loaded road network; the name/position tables are built with the map
+            self.cities = None
+            self.roads = None
+            self.map_limits = None
 
-        # Color scheme
-        self.colors = {
-            'source': '#ff4500', 'destination': '#9370db', 'current': '#32cd32',
-            'visited': '#ffd700', 'current_path': '#ff4444', 'final_path': '#1e90ff',
-            'cities': '#2f4f4f', 'roads': '#a9a9a9', 'background': '#f0f8ff'
-        }
+        if landmarks_path:
+            from landmarks import LandmarkIndex
+
+            graph.landmark_index = LandmarkIndex.load(landmarks_path, graph)
+        self.graph = graph
+        self.query_cache = QueryCache(graph)
+        self.city_names = self.graph.names
+        self.map_name = map_name
+
+        # Phase timings and search counters, shown in the profile panel
+        self.profiler = Profiler(enabled=profile)
+        self.profile_shown = 0.0
 
         # Initialize state
         self.reset_state()
@@ -59,16 +56,23 @@ class RomaniaDFSTkinterApp:
     def reset_state(self):
         """Reset algorithm state"""
         self.visited = set()
-        self.stack = []
+        self.search = None
+        self.search_algorithm = None
+        self.trace = None
+        self.view_step = 0
+        self.view_state = None
+        self.pending_load = False
+        self.search_time = 0.0
+        self.final_distance = None
         self.current_city = None
         self.current_path = []
         self.found = False
         self.completed = False
         self.step_count = 0
         self.final_path = []
+        self.repair_report = None
         self.source_city = None
         self.dest_city = None
-        self.auto_running = False
 
     def setup_ui(self):
         """Create user interface"""
@@ -85,24 +89,35 @@ class RomaniaDFSTkinterApp:
         city_frame.pack(fill=tk.X, pady=5)
 
         ttk.Label(city_frame, text="🚩 Source:").pack(side=tk.LEFT, padx=(0, 10))
-        self.source_var = tk.StringVar(value='Arad')
+        self.source_var = tk.StringVar(value='Arad' if self.cities and 'Arad' in self.cities else self.city_names[0])
         self.source_combo = ttk.Combobox(city_frame, textvariable=self.source_var, 
-                                        values=list(self.cities.keys()), state="readonly")
+                                        values=list(self.city_names), state="readonly")
         self.source_combo.pack(side=tk.LEFT, padx=(0, 20))
 
         ttk.Label(city_frame, text="🎯 Destination:").pack(side=tk.LEFT, padx=(0, 10))
-        self.dest_var = tk.StringVar(value='Bucharest')
+        self.dest_var = tk.StringVar(value='Bucharest' if self.cities and 'Bucharest' in self.cities
+                                     else self.city_names[-1])
         self.dest_combo = ttk.Combobox(city_frame, textvariable=self.dest_var, 
-                                      values=list(self.cities.keys()), state="readonly")
-        self.dest_combo.pack(side=tk.LEFT)
+                                      values=list(self.city_names), state="readonly")
+        self.dest_combo.pack(side=tk.LEFT, padx=(0, 20))
+
+        ttk.Label(city_frame, text="🧭 Algorithm:").pack(side=tk.LEFT, padx=(0, 10))
+        self.algorithm_names = {ALGORITHMS[key].name: key for key in available_algorithms(self.graph)}
+        self.algorithm_var = tk.StringVar(value=ALGORITHMS['dfs'].name)
+        self.algorithm_combo = ttk.Combobox(city_frame, textvariable=self.algorithm_var,
+                                            values=list(self.algorithm_names), state="readonly")
+        self.algorithm_combo.pack(side=tk.LEFT)
 
         # Buttons
         button_frame = ttk.Frame(control_frame)
         button_frame.pack(fill=tk.X, pady=5)
 
-        self.start_btn = ttk.Button(button_frame, text="🚀 Start DFS", command=self.start_dfs)
+        self.start_btn = ttk.Button(button_frame, text="🚀 Start Search", command=self.start_dfs)
         self.start_btn.pack(side=tk.LEFT, padx=(0, 5))
 
+        self.back_btn = ttk.Button(button_frame, text="⏮️ Back", command=self.previous_step)
+        self.back_btn.pack(side=tk.LEFT, padx=(0, 5))
+
         self.step_btn = ttk.Button(button_frame, text="⏭️ Next Step", command=self.next_step)
         self.step_btn.pack(side=tk.LEFT, padx=(0, 5))
 
@@ -113,23 +128,86 @@ class RomaniaDFSTkinterApp:
         self.reset_btn.pack(side=tk.LEFT, padx=(0, 5))
 
         self.show_path_btn = ttk.Button(button_frame, text="🔵 Show Path", command=self.show_final_path)
-        self.show_path_btn.pack(side=tk.LEFT)
+        self.show_path_btn.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.profile_var = tk.BooleanVar(value=self.profiler.enabled)
+        self.profile_check = ttk.Checkbutton(button_frame, text="📊 Profile", variable=self.profile_var,
+                                             command=self.toggle_profiling)
+        self.profile_check.pack(side=tk.LEFT, padx=(10, 5))
+
+        self.save_profile_btn = ttk.Button(button_frame, text="💾 Save Profile", command=self.save_profile)
+        self.save_profile_btn.pack(side=tk.LEFT)
 
-        # Speed control
+        # Speed control: search steps per rendered frame and frames per second
         speed_frame = ttk.Frame(control_frame)
         speed_frame.pack(fill=tk.X, pady=5)
 
-        ttk.Label(speed_frame, text="Speed:").pack(side=tk.LEFT)
-        self.speed_var = tk.DoubleVar(value=1.5)
-        self.speed_scale = ttk.Scale(speed_frame, from_=0.5, to=3.0, variable=self.speed_var, 
+        ttk.Label(speed_frame, text="Steps/frame:").pack(side=tk.LEFT)
+        self.steps_var = tk.IntVar(value=1)
+        self.steps_spin = ttk.Spinbox(speed_frame, from_=1, to=100000, increment=1, width=8,
+                                      textvariable=self.steps_var)
+        self.steps_spin.pack(side=tk.LEFT, padx=(10, 20))
+
+        self.to_end_var = tk.BooleanVar(value=False)
+        self.to_end_check = ttk.Checkbutton(speed_frame, text="⏩ Run to completion", variable=self.to_end_var)
+        self.to_end_check.pack(side=tk.LEFT, padx=(0, 20))
+
+        ttk.Label(speed_frame, text="FPS:").pack(side=tk.LEFT)
+        self.fps_var = tk.DoubleVar(value=1.0)
+        self.fps_scale = ttk.Scale(speed_frame, from_=0.5, to=60.0, variable=self.fps_var,
                                    orient=tk.HORIZONTAL)
-        self.speed_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+        self.fps_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+
+        self.scheduler = FrameScheduler(self.root, self.auto_step, self.refresh, on_finish=self.auto_finished,
+                                        profiler=self.profiler)
+        for var in (self.steps_var, self.to_end_var, self.fps_var):
+            var.trace_add('write', lambda *args: self.configure_scheduler())
+
+        # Timeline of the recorded search steps
+        timeline_frame = ttk.Frame(control_frame)
+        timeline_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(timeline_frame, text="Timeline:").pack(side=tk.LEFT)
+        self.timeline_var = tk.DoubleVar(value=0)
+        self.timeline = ttk.Scale(timeline_frame, from_=0, to=1, variable=self.timeline_var,
+                                  orient=tk.HORIZONTAL, command=self.on_timeline)
+        self.timeline.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(10, 0))
+
+        # Road closures and length changes, applied to the running search
+        road_frame = ttk.Frame(control_frame)
+        road_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(road_frame, text="🚧 Road:").pack(side=tk.LEFT, padx=(0, 10))
+        self.road_from_var = tk.StringVar()
+        self.road_from_combo = ttk.Combobox(road_frame, textvariable=self.road_from_var,
+                                            values=list(self.city_names), state="readonly")
+        self.road_from_combo.pack(side=tk.LEFT, padx=(0, 5))
+        self.road_from_combo.bind('<<ComboboxSelected>>', lambda event: self.update_road_ends())
+
+        ttk.Label(road_frame, text="↔").pack(side=tk.LEFT, padx=(0, 5))
+        self.road_to_var = tk.StringVar()
+        self.road_to_combo = ttk.Combobox(road_frame, textvariable=self.road_to_var, state="readonly")
+        self.road_to_combo.pack(side=tk.LEFT, padx=(0, 10))
+        self.road_to_combo.bind('<<ComboboxSelected>>', lambda event: self.update_road_length())
+
+        ttk.Label(road_frame, text="Length:").pack(side=tk.LEFT)
+        self.road_length_var = tk.StringVar()
+        ttk.Entry(road_frame, textvariable=self.road_length_var, width=8).pack(side=tk.LEFT, padx=(5, 10))
+
+        self.close_road_btn = ttk.Button(road_frame, text="⛔ Close", command=lambda: self.edit_road('close'))
+        self.close_road_btn.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.reopen_road_btn = ttk.Button(road_frame, text="✅ Reopen", command=lambda: self.edit_road('reopen'))
+        self.reopen_road_btn.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.road_length_btn = ttk.Button(road_frame, text="📏 Set Length", command=lambda: self.edit_road('length'))
+        self.road_length_btn.pack(side=tk.LEFT)
 
         # Status display
         status_frame = ttk.LabelFrame(control_frame, text="Status")
         status_frame.pack(fill=tk.X, pady=5)
 
-        self.status_var = tk.StringVar(value="🇷🇴 Romania DFS Pathfinder - Select cities and click Start DFS")
+        self.status_var = tk.StringVar(value=f"{self.map_name} Pathfinder - Select cities and click Start Search")
         self.status_label = ttk.Label(status_frame, textvariable=self.status_var, 
                                     wraplength=1000, justify=tk.LEFT)
         self.status_label.pack(fill=tk.X, padx=5, pady=5)
@@ -139,27 +217,64 @@ class RomaniaDFSTkinterApp:
                                   wraplength=1000, justify=tk.LEFT)
         self.info_label.pack(fill=tk.X, padx=5, pady=5)
 
-        # Matplotlib figure
-        fig_frame = ttk.Frame(main_frame)
-        fig_frame.pack(fill=tk.BOTH, expand=True)
+        # Rolling phase timings, shown while profiling
+        self.profile_frame = ttk.LabelFrame(control_frame, text="Profile (rolling p50/p95)")
+        self.profile_text = tk.StringVar()
+        ttk.Label(self.profile_frame, textvariable=self.profile_text, font='TkFixedFont',
+                  justify=tk.LEFT).pack(fill=tk.X, padx=5, pady=5)
+        if self.profiler.enabled:
+            self.profile_frame.pack(fill=tk.X, pady=5)
+
+        # The map is built once the window is up, see build_map()
+        self.fig_frame = ttk.Frame(main_frame)
+        self.fig_frame.pack(fill=tk.BOTH, expand=True)
+        self.loading_label = ttk.Label(self.fig_frame, text="🗺️ Loading map...", anchor=tk.CENTER)
+        self.loading_label.pack(fill=tk.BOTH, expand=True)
+        self.renderer = None
+        self.root.after_idle(self.build_map)
+
+    def build_map(self):
+        """Import matplotlib, create the figure and draw the first frame
+
+        Deferred to the first idle moment so the window and controls appear
+        before the plotting stack is imported; until then draw_map() does
+        nothing and the first frame shows whatever state the app is in.
+        """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        from map_renderer import COLORS, MapRenderer
+
+        if self.cities is None:
+            graph = self.graph
+            self.cities = {name: graph.coords(u) for u, name in enumerate(graph.names)}
+            self.roads = [(graph.names[u], graph.names[v], w)
+                          for u in range(graph.num_nodes) for v, w in graph.edges(u) if u < v]
 
+        # Color scheme
+        self.colors = dict(COLORS)
+
+        self.loading_label.destroy()
         self.fig = Figure(figsize=(12, 8), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, fig_frame)
+        self.canvas = FigureCanvasTkAgg(self.fig, self.fig_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-        # Draw initial map
-        self.draw_initial_map()
+        self.renderer = MapRenderer(self.fig, self.canvas, self.cities, self.roads, self.colors,
+                                    limits=self.map_limits, profiler=self.profiler)
+        names = self.city_names
+        self.renderer.set_closed_roads([(names[u], names[v]) for u, v in self.graph.closed_roads()])
+        self.draw_map(show_algorithm=self.search is not None)
 
     def reset(self):
         """Reset visualization"""
-        self.auto_running = False
+        self.stop_auto_run()
         self.reset_state()
-        self.status_var.set("🇷🇴 Romania DFS Pathfinder - Select cities and click Start DFS")
+        self.status_var.set(f"{self.map_name} Pathfinder - Select cities and click Start Search")
+        self.update_timeline()
         self.update_info()
         self.draw_initial_map()
 
     def start_dfs(self):
-        """Start DFS algorithm"""
+        """Start the selected search algorithm"""
         source = self.source_var.get()
         dest = self.dest_var.get()
 
@@ -167,103 +282,374 @@ class RomaniaDFSTkinterApp:
             messagebox.showerror("Error", "Source and destination cannot be the same!")
             return
 
+        self.stop_auto_run()
         self.reset_state()
         self.source_city = source
         self.dest_city = dest
-        self.stack = [(source, [source])]
-
-        self.status_var.set(f"Started DFS: {source} → {dest}")
+        self.search_algorithm = self.algorithm_names[self.algorithm_var.get()]
+        try:
+            self.search = make_search(self.search_algorithm, self.graph,
+                                      self.graph.node_id(source), self.graph.node_id(dest))
+        except ValueError as e:
+            # e.g. ALT after a road edit has dropped the landmark index
+            self.search_algorithm = None
+            messagebox.showerror("Error", str(e))
+            return
+        self.trace = SearchTrace.for_search(self.search, self.search_algorithm)
+        self.profiler.reset_counters()
+        self.update_timeline()
+
+        self.status_var.set(f"Started {self.search.name}: {source} → {dest}")
+        cached = self.query_cache.lookup(self.search.source, self.search.dest, self.search_algorithm)
+        if cached is not None and cached.found:
+            self.status_var.set(f"Started {self.search.name}: {source} → {dest}\n"
+                                f"Cached answer: {cached.distance:g} km via "
+                                f"{' → '.join(self.city_names[i] for i in cached.path)}")
+        if self.search.unreachable:
+            self.status_var.set(f"Started {self.search.name}: {source} → {dest}\n"
+                                f"{self.unreachable_reason()}")
         self.update_info()
         self.draw_map()
 
     def next_step(self):
-        """Execute next DFS step"""
-        if self.completed or not self.stack:
+        """Execute next search step"""
+        if self.completed or not self.search:
             if not self.found:
                 self.status_var.set("Result: No path found!")
             return
 
-        # DFS step
-        self.current_city, self.current_path = self.stack.pop()
-        self.step_count += 1
+        self.advance_search()
+        self.refresh()
+
+    def advance_search(self):
+        """Run one search step and update the state, without drawing"""
+        if self.view_step < self.trace.steps:
+            # Replay recorded steps after seeking back; the state is loaded when drawn
+            self.view_step += 1
+            self.pending_load = True
+            if self.view_step == self.trace.steps:
+                self.load_step(self.view_step)
+            return
+
+        search = self.search
+        profiler = self.profiler
+        if profiler.enabled:
+            frontier, settled = search.frontier_size(), search.visited_count
+        start = time.perf_counter()
+        stepped = search.step()
+        end = time.perf_counter()
+        self.search_time += end - start
+        if profiler.enabled:
+            profiler.add('step', start, end)
+            if stepped:
+                profiler.count_step(search, frontier, settled)
+        if not stepped:
+            self.completed = True
+            self.trace.finish(search)
+            self.remember_result()
+            self.report_repair()
+            return
+        self.trace.record(search)
+        self.view_step = self.trace.steps
+
+        self.current_city = self.city_names[search.current]
+        self.step_count = search.step_count
 
         # Check if destination reached
-        if self.current_city == self.dest_city:
+        if search.found:
             self.found = True
             self.completed = True
-            self.final_path = self.current_path
-            distance = self.calculate_path_distance(self.final_path)
-            self.status_var.set(f"🎉 Path Found!\nSteps: {self.step_count}\nDistance: {distance} km\nPath: {' → '.join(self.final_path)}")
-            self.update_info()
-            self.draw_map()
+            self.current_path = [self.city_names[i] for i in search.path()]
+            self.final_path = [self.city_names[i] for i in search.final_path()]
+            self.final_distance = search.distance()
+            self.trace.finish(search)
+            self.remember_result()
+            self.report_repair()
             return
 
         # Process current city
-        if self.current_city not in self.visited:
+        if search.last_expanded:
             self.visited.add(self.current_city)
 
-            # Add neighbors to stack
-            for neighbor in self.graph.neighbors(self.current_city):
-                if neighbor not in self.visited:
-                    self.stack.append((neighbor, self.current_path + [neighbor]))
-
-        self.status_var.set(f"Step {self.step_count}: Visiting {self.current_city}")
+    def refresh(self):
+        """Bring the status text, info panel and map up to date"""
+        search = self.search
+        if self.pending_load:
+            self.load_step(self.view_step)
+        live = self.trace is None or self.view_step == self.trace.steps
+        repair = f"\n{self.repair_report}" if self.repair_report else ""
+        if not live:
+            self.status_var.set(f"⏪ Step {self.view_step} of {self.trace.steps}: "
+                                f"Visiting {self.current_city or self.source_city}")
+        elif self.found:
+            self.status_var.set(f"🎉 Path Found!\nSteps: {self.step_count}\nExpanded: {search.visited_count}\n"
+                                f"Search time: {self.search_time * 1000:.2f} ms\n"
+                                f"Distance: {self.final_distance:g} km\nPath: {' → '.join(self.final_path)}{repair}")
+        elif self.completed:
+            if search.unreachable:
+                self.status_var.set(f"Result: No path found!\n{self.unreachable_reason()}")
+            else:
+                self.status_var.set(f"Result: No path found!\nExpanded: {search.visited_count}{repair}")
+        else:
+            self.status_var.set(f"Step {self.step_count}: Visiting {self.current_city}")
+        if search is not None and live and not self.found:
+            self.current_path = [self.city_names[i] for i in search.path()] if self.current_city else []
+        self.update_timeline()
         self.update_info()
         self.draw_map()
+        # During auto run the panel is throttled; manual steps always show their timings
+        self.update_profile(force=not self.scheduler.running)
+
+    def load_step(self, step):
+        """Show the recorded state after the given step of the current search"""
+        trace, names = self.trace, self.city_names
+        state = trace.state_at(step)
+        self.view_step = state.step
+        self.view_state = state
+        self.pending_load = False
+        self.visited = {names[i] for i in trace.visited_at(state.step)}
+        self.current_city = names[state.current] if state.current >= 0 else None
+        self.current_path = [names[i] for i in trace.path_at(state.step)]
+        self.step_count = state.step
+
+        # Only the last recorded step can be the end of the search
+        live = state.step == trace.steps
+        self.found = live and self.search.found
+        self.completed = live and self.search.completed
+        self.final_path = [names[i] for i in self.search.final_path()] if self.found else []
+        self.final_distance = self.search.distance() if self.found else None
+
+    def previous_step(self):
+        """Step back through the recorded search"""
+        if not self.trace or self.view_step == 0:
+            return
+        self.stop_auto_run()
+        self.load_step(self.view_step - 1)
+        self.refresh()
+
+    def on_timeline(self, value):
+        """Jump to the step picked on the timeline"""
+        if not self.trace:
+            return
+        step = min(int(round(float(value))), self.trace.steps)
+        if step == self.view_step:
+            return
+        self.stop_auto_run()
+        self.load_step(step)
+        self.refresh()
+
+    def update_timeline(self):
+        """Stretch the timeline over the recorded steps and mark the shown one"""
+        steps = self.trace.steps if self.trace else 0
+        self.timeline.configure(to=max(steps, 1))
+        self.timeline_var.set(self.view_step)
+
+    def remember_result(self):
+        """Store the finished search in the query cache"""
+        self.query_cache.store(result_from_search(self.search, self.search_algorithm))
+
+    def unreachable_reason(self):
+        """Explain why the component index rejected the current query"""
+        return (f"{self.dest_city} is not connected to {self.source_city} by any road "
+                f"(different connected components), so nothing was searched.")
+
+    def stack_size(self):
+        """Number of entries on the search stack or heap"""
+        if self.trace and self.view_step < self.trace.steps and self.view_state is not None:
+            return self.view_state.frontier
+        return self.search.frontier_size() if self.search else 0
+
+    def configure_scheduler(self):
+        """Apply the steps-per-frame, run-to-completion and FPS controls"""
+        try:
+            steps = max(1, int(self.steps_var.get()))
+        except (tk.TclError, ValueError):
+            steps = 1
+        self.scheduler.steps_per_frame = None if self.to_end_var.get() else steps
+        self.scheduler.fps = self.fps_var.get()
 
     def toggle_auto_run(self):
         """Toggle auto run mode"""
-        if not self.auto_running:
-            self.auto_running = True
-            self.auto_btn.config(text="⏹️ Stop Auto")
-            self.auto_thread = threading.Thread(target=self.auto_run)
-            self.auto_thread.daemon = True
-            self.auto_thread.start()
+        if self.scheduler.running:
+            self.stop_auto_run()
+            return
+
+        if self.search is None:
+            self.start_dfs()
+        if self.completed or not self.search:
+            return
+        self.configure_scheduler()
+        self.auto_btn.config(text="⏹️ Stop Auto")
+        self.scheduler.start()
+
+    def stop_auto_run(self):
+        """Stop the auto run scheduler"""
+        self.scheduler.stop()
+        self.auto_btn.config(text="⚡ Auto Run")
+
+    def auto_step(self):
+        """One scheduled search step; False once the search has finished"""
+        if self.completed:
+            return False
+        self.advance_search()
+        return not self.completed
+
+    def auto_finished(self):
+        """Called by the scheduler after rendering the final frame"""
+        self.auto_btn.config(text="⚡ Auto Run")
+
+    def toggle_profiling(self):
+        """Turn instrumentation on or off and show or hide the profile panel"""
+        self.profiler.enabled = self.profile_var.get()
+        if self.profiler.enabled:
+            self.profiler.reset()
+            self.profile_frame.pack(fill=tk.X, pady=5)
+            self.update_profile(force=True)
         else:
-            self.auto_running = False
-            self.auto_btn.config(text="⚡ Auto Run")
+            self.profile_frame.pack_forget()
 
-    def auto_run(self):
-        """Run DFS automatically"""
-        if not self.stack and not self.completed:
-            self.root.after(0, self.start_dfs)
+    def update_profile(self, force=False):
+        """Refresh the profile panel, a few times per second at most"""
+        if not self.profiler.enabled:
+            return
+        now = time.perf_counter()
+        if not force and now - self.profile_shown < PROFILE_INTERVAL:
+            return
+        self.profile_shown = now
+        self.profiler.snapshot()
+        self.profile_text.set(self.profiler.summary())
+
+    def save_profile(self):
+        """Write the recorded spans and counters as a Chrome trace"""
+        if not self.profiler.events:
+            self.status_var.set("Info: Nothing profiled yet. Tick Profile and run a search first.")
+            return
+        path = filedialog.asksaveasfilename(title="Save profile", defaultextension='.json',
+                                            filetypes=[("Chrome trace", "*.json"), ("All files", "*")])
+        if path:
+            self.profiler.save_chrome_trace(path)
+            self.status_var.set(f"Profile saved to {path} (open it in chrome://tracing or Perfetto)")
+
+    def update_road_ends(self):
+        """List the roads leaving the city picked as the first road end"""
+        try:
+            u = self.graph.node_id(self.road_from_var.get())
+        except KeyError:
+            return
+        ends = list(self.graph.neighbors(u)) + [v for a, b in self.graph.closed_roads() for v in (a, b)
+                                                if u in (a, b) and v != u]
+        self.road_to_combo.configure(values=[self.city_names[v] for v in ends])
+        self.road_to_var.set(self.city_names[ends[0]] if ends else "")
+        self.update_road_length()
+
+    def update_road_length(self):
+        """Show the length of the picked road in the length field"""
+        try:
+            u, v = self.graph.node_id(self.road_from_var.get()), self.graph.node_id(self.road_to_var.get())
+            self.road_length_var.set(f"{self.graph.edge_weight(u, v):g}")
+        except KeyError:
+            self.road_length_var.set("")
+
+    def edit_road(self, action):
+        """Close, reopen or change the length of the picked road"""
+        graph = self.graph
+        try:
+            u, v = graph.node_id(self.road_from_var.get()), graph.node_id(self.road_to_var.get())
+        except KeyError:
+            messagebox.showerror("Error", "Pick a road first: a city and one of its neighbors")
+            return
+        if action == 'length':
+            try:
+                length = float(self.road_length_var.get())
+            except ValueError:
+                length = math.nan
+            if not 0 < length < math.inf:
+                messagebox.showerror("Error", "Road length must be a positive number")
+                return
+        try:
+            if action == 'close':
+                graph.close_road(u, v)
+            elif action == 'reopen':
+                graph.reopen_road(u, v)
+            else:
+                graph.set_road_length(u, v, length)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
 
-        while self.auto_running and not self.completed and self.stack:
-            self.root.after(0, self.next_step)
-            time.sleep(2.0 / self.speed_var.get())
-            if not self.auto_running:
-                break
+        if self.renderer is not None:
+            names = self.city_names
+            self.renderer.set_closed_roads([(names[a], names[b]) for a, b in graph.closed_roads()])
+            self.renderer.set_road_length(names[u], names[v], graph.edge_weight(u, v))
+        self.replan(u, v)
+
+    def replan(self, u, v):
+        """Carry the current search over a road edit
+
+        Incremental engines repair their search in place; any other search
+        is started again from scratch.
+        """
+        road = f"{self.city_names[u]} - {self.city_names[v]}"
+        search = self.search
+        if search is None:
+            self.draw_map(show_algorithm=False)
+            self.status_var.set(f"Road {road} updated")
+            return
+        if not hasattr(search, 'road_changed'):
+            self.start_dfs()
+            if self.search is not None:
+                self.status_var.set(f"Road {road} updated: {self.search.name} cannot repair a search, "
+                                    f"so it started over")
+            return
 
-        self.auto_running = False
-        self.root.after(0, lambda: self.auto_btn.config(text="⚡ Auto Run"))
+        if self.view_step < self.trace.steps:
+            self.load_step(self.trace.steps)
+        search.road_changed(u, v)
+        self.trace.record_edit(search, u, v)
+        self.completed = False
+        self.found = False
+        self.final_path = []
+        self.final_distance = None
+        self.repair_report = None
+        self.refresh()
+        self.status_var.set(f"Road {road} updated: repairing the {search.name} search, keep stepping")
+
+    def report_repair(self):
+        """Compare the work of a finished repair with a search from scratch"""
+        search = self.search
+        if not getattr(search, 'edits', 0):
+            return
+        fresh = make_search(self.search_algorithm, self.graph, search.source, search.dest)
+        fresh.run()
+        self.repair_report = (f"🔧 Repair after road edit: {search.repair_expanded} expansions touching "
+                              f"{len(search.repair_touched)} nodes, vs {fresh.visited_count} for a full re-search")
 
     def show_final_path(self):
         """Show only final path"""
         if not self.found:
-            self.status_var.set("Info: No path found yet. Run DFS first.")
+            self.status_var.set("Info: No path found yet. Run a search first.")
             return
 
         self.draw_map(show_final_only=True)
 
     def calculate_path_distance(self, path):
         """Calculate total path distance"""
-        total = 0
-        for i in range(len(path) - 1):
-            city1, city2 = path[i], path[i+1]
-            for road in self.roads:
-                if (road[0] == city1 and road[1] == city2) or (road[0] == city2 and road[1] == city1):
-                    total += road[2]
-                    break
-        return total
+        return self.graph.path_distance([self.graph.node_id(city) for city in path])
 
     def update_info(self):
         """Update information panel"""
-        info = f"Steps: {self.step_count} | Visited: {len(self.visited)} | Stack: {len(self.stack)}"
-        if self.current_path:
-            info += f"\nCurrent Path: {' → '.join(self.current_path)}"
-        if self.found:
-            info += f"\nFinal Path: {' → '.join(self.final_path)}"
-        self.info_var.set(info)
+        with self.profiler.span('update_info'):
+            info = f"Steps: {self.step_count} | Visited: {len(self.visited)} | Stack: {self.stack_size()}"
+            if self.scheduler.running:
+                info += (f" | Auto: {self.scheduler.steps_per_second():.0f} steps/s, "
+                         f"{self.scheduler.frames} frames, {self.scheduler.dropped} dropped")
+            if self.trace:
+                info += f" | Trace: {self.trace.steps} steps, {self.trace.nbytes} bytes"
+            if self.current_path:
+                info += f"\nCurrent Path: {' → '.join(self.current_path)}"
+            if self.found:
+                info += f"\nFinal Path: {' → '.join(self.final_path)}"
+            self.info_var.set(info)
 
     def draw_initial_map(self):
         """Draw initial map"""
@@ -271,185 +657,45 @@ class RomaniaDFSTkinterApp:
 
     def draw_map(self, show_algorithm=True, show_final_only=False):
         """Draw the Romania map with highlighted features"""
-        self.fig.clear()
-        ax = self.fig.add_subplot(111)
-        
-        ax.set_facecolor(self.colors['background'])
-        ax.set_xlim(0.5, 11.5)
-        ax.set_ylim(1.0, 8.5)
-        ax.set_aspect('equal')
-        ax.axis('off')
-
-        # Draw backdrop roads
-        for city1, city2, dist in self.roads:
-            x1, y1 = self.cities[city1]
-            x2, y2 = self.cities[city2]
-            
-            # Determine line color and width based on state
-            line_color = self.colors['roads']
-            line_width = 3
-            alpha = 0.4
-            
-            # Highlight if this road is in current path
-            if show_algorithm and self.current_path:
-                for i in range(len(self.current_path) - 1):
-                    if (city1 == self.current_path[i] and city2 == self.current_path[i+1]) or \
-                       (city2 == self.current_path[i] and city1 == self.current_path[i+1]):
-                        line_color = self.colors['current_path']
-                        line_width = 6
-                        alpha = 0.9
-                        break
-            
-            # Shadow/glow underline
-            ax.plot([x1, x2], [y1, y2], color='white', linewidth=line_width+4, alpha=0.2, zorder=1)
-            # Main road line
-            ax.plot([x1, x2], [y1, y2], 'o-', 
-                    color=line_color, linewidth=line_width, alpha=alpha, markersize=0, zorder=2)
-            
-            # Distance label
-            if show_final_only or alpha > 0.7:
-                mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-                ax.text(mid_x, mid_y, str(dist), fontsize=9, fontweight='bold', ha='center', va='center',
-                        bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor=line_color, alpha=0.85))
-
-        # Draw all cities with basic styling
-        for city, (x, y) in self.cities.items():
-            # Base city dot
-            ax.plot(x, y, 'o', markersize=10, markerfacecolor=self.colors['cities'],
-                    markeredgecolor='black', markeredgewidth=1.5, alpha=0.7, zorder=3)
-            
-            # City name
-            ax.text(x, y - 0.25, city, fontsize=9, fontweight='normal', ha='center', va='top',
-                    bbox=dict(boxstyle="round,pad=0.3", facecolor='white', edgecolor='#666', alpha=0.8))
-
-        # Highlight visited cities
-        for city in self.visited:
-            x, y = self.cities[city]
-            ax.plot(x, y, 'o', markersize=20, markerfacecolor='yellow', alpha=0.3, zorder=4)
-            ax.plot(x, y, 's', markersize=12, markerfacecolor=self.colors['visited'],
-                    markeredgecolor='orange', markeredgewidth=3, zorder=5)
-            ax.text(x, y - 0.25, city, fontsize=10, fontweight='bold', ha='center', va='top',
-                    bbox=dict(boxstyle="round,pad=0.3", facecolor='yellow', edgecolor='orange', alpha=0.9))
-
-        # Highlight current exploration path
-        if self.current_path and show_algorithm:
-            for i in range(len(self.current_path) - 1):
-                city1, city2 = self.current_path[i], self.current_path[i+1]
-                x1, y1 = self.cities[city1]
-                x2, y2 = self.cities[city2]
-                
-                ax.plot([x1, x2], [y1, y2], '-', color='red', linewidth=10, alpha=0.3, zorder=6)
-                ax.plot([x1, x2], [y1, y2], '-', color=self.colors['current_path'], 
-                        linewidth=6, alpha=0.9, zorder=7)
-                
-                ax.annotate("", xy=(x2, y2), xytext=(x1, y1),
-                           arrowprops=dict(arrowstyle="->,head_length=0.8,head_width=0.8",
-                                         lw=2, color='red', alpha=0.8))
-            
-            for city in self.current_path:
-                x, y = self.cities[city]
-                ax.plot(x, y, 'o', markersize=16, markerfacecolor=self.colors['current_path'],
-                        markeredgecolor='darkred', markeredgewidth=4, zorder=8)
-
-        # Highlight final path
-        if self.found and (show_algorithm or show_final_only):
-            for i in range(len(self.final_path) - 1):
-                city1, city2 = self.final_path[i], self.final_path[i+1]
-                x1, y1 = self.cities[city1]
-                x2, y2 = self.cities[city2]
-                
-                ax.plot([x1, x2], [y1, y2], '-', color='white', linewidth=14, alpha=0.4, zorder=9)
-                ax.plot([x1, x2], [y1, y2], '-', color=self.colors['final_path'], 
-                        linewidth=10, alpha=1.0, zorder=10)
-                
-                ax.annotate("", xy=(x2, y2), xytext=(x1, y1),
-                           arrowprops=dict(arrowstyle="->,head_length=1.0,head_width=1.0",
-                                         lw=3, color='blue', alpha=0.9))
-            
-            for city in self.final_path:
-                x, y = self.cities[city]
-                ax.plot(x, y, 'D', markersize=14, markerfacecolor=self.colors['final_path'],
-                        markeredgecolor='navy', markeredgewidth=4, zorder=11)
-                ax.text(x, y - 0.25, city, fontsize=11, fontweight='bold', ha='center', va='top',
-                        bbox=dict(boxstyle="round,pad=0.3", facecolor='lightblue', edgecolor='blue', alpha=0.95))
-
-        # Current city highlight
-        if self.current_city and show_algorithm:
-            x, y = self.cities[self.current_city]
-            ax.plot(x, y, 'o', markersize=30, markerfacecolor='lime', alpha=0.4, zorder=12)
-            ax.plot(x, y, 'o', markersize=20, markerfacecolor=self.colors['current'],
-                    markeredgecolor='darkgreen', markeredgewidth=5, zorder=13)
-            ax.text(x, y + 0.4, 'CURRENT', fontsize=12, fontweight='bold', ha='center', va='bottom',
-                    bbox=dict(boxstyle="round,pad=0.4", facecolor='lightgreen', edgecolor='green', alpha=0.9),
-                    zorder=14)
-
-        # Source and destination
-        if self.source_city:
-            x, y = self.cities[self.source_city]
-            ax.plot(x, y, '^', markersize=22, markerfacecolor=self.colors['source'],
-                    markeredgecolor='darkred', markeredgewidth=4, zorder=15)
-            ax.text(x, y - 0.4, 'START', fontsize=12, fontweight='bold', ha='center', va='top',
-                    bbox=dict(boxstyle="round,pad=0.4", facecolor='red', edgecolor='darkred', alpha=0.9))
-        
-        if self.dest_city:
-            x, y = self.cities[self.dest_city]
-            ax.plot(x, y, 'v', markersize=22, markerfacecolor=self.colors['destination'],
-                    markeredgecolor='navy', markeredgewidth=4, zorder=15)
-            ax.text(x, y - 0.4, 'GOAL', fontsize=12, fontweight='bold', ha='center', va='top',
-                    bbox=dict(boxstyle="round,pad=0.4", facecolor='purple', edgecolor='navy', alpha=0.9))
-
-        # Title and status
-        title = f"🇷🇴 Romania Map - DFS Pathfinding: {self.source_city} → {self.dest_city}" 
-        if show_final_only:
-            title += " (Final Path)"
-        elif self.found:
-            title += " ✓ PATH FOUND"
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-
-        # Enhanced status info
-        status_info = f"Step: {self.step_count} | Visited: {len(self.visited)} | Stack: {len(self.stack)}"
-        if self.current_city:
-            status_info += f"\n● Exploring: {self.current_city}"
-        if self.current_path:
-            status_info += f"\n🛣️ Current Path: {' → '.join(self.current_path)}"
-        if self.found:
-            distance = self.calculate_path_distance(self.final_path)
-            status_info += f"\n🎉 PATH FOUND! Distance: {distance} km"
-        elif self.completed:
-            status_info += f"\n❌ NO PATH FOUND"
-        
-        ax.text(0.02, 0.98, status_info, transform=ax.transAxes, fontsize=11, fontweight='bold',
-                verticalalignment='top', bbox=dict(boxstyle="round,pad=0.5", facecolor='#e1ffee', edgecolor='#2e8b57', alpha=0.95))
+        if self.renderer is None:
+            return
+        from map_renderer import frame_text
 
-        # Legend
-        self.create_legend(ax, show_final_only)
-        
-        self.fig.tight_layout()
-        self.canvas.draw()
-
-    def create_legend(self, ax, show_final_only=False):
-        """Create proper legend"""
-        if show_final_only:
-            elements = [
-                mpatches.Patch(color=self.colors['final_path'], label='Final Path'),
-                mpatches.Patch(color=self.colors['source'], label='Source City'),
-                mpatches.Patch(color=self.colors['destination'], label='Destination City'),
-            ]
-        else:
-            elements = [
-                mpatches.Patch(color=self.colors['source'], label='Source City'),
-                mpatches.Patch(color=self.colors['destination'], label='Destination City'),
-                mpatches.Patch(color=self.colors['current'], label='Current Node'),
-                mpatches.Patch(color=self.colors['visited'], label='Visited Nodes'),
-                mpatches.Patch(color=self.colors['current_path'], label='Current Path'),
-                mpatches.Patch(color=self.colors['final_path'], label='Final Path'),
-            ]
-
-        ax.legend(handles=elements, loc='lower left', framealpha=0.9, fontsize=10,
-                 bbox_to_anchor=(0.0, 0.0))
+        with self.profiler.span('render'):
+            algorithm = self.search.name if self.search else self.algorithm_var.get()
+            title, status_info = frame_text(self.map_name, algorithm, self.source_city, self.dest_city,
+                                            self.step_count, len(self.visited), self.stack_size(),
+                                            self.current_city, self.current_path, self.found, self.completed,
+                                            self.final_distance, show_final_only)
+
+            self.renderer.render(self.visited, self.current_city, self.current_path,
+                                 self.final_path if self.found and (show_algorithm or show_final_only) else [],
+                                 self.source_city, self.dest_city, title, status_info,
+                                 show_algorithm=show_algorithm, show_final_only=show_final_only)
 
 # Create and run the application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visualize path search on the Romania map or a loaded road network")
+    parser.add_argument('--nodes', help="node file with name,x,y lines")
+    parser.add_argument('--edges', help="edge file with name1,name2[,weight] lines")
+    parser.add_argument('--cache', help="binary graph cache to load or (re)build")
+    parser.add_argument('--landmarks', help="landmark index directory from landmarks.py, enables ALT")
+    parser.add_argument('--profile', metavar='TRACE_JSON',
+                        help="profile from the start and write a Chrome trace to this file on exit")
+    args = parser.parse_args()
+
+    graph, map_name = None, "🇷🇴 Romania"
+    if args.nodes and args.edges:
+        graph = load_graph(args.nodes, args.edges, args.cache)
+        map_name = os.path.splitext(os.path.basename(args.edges))[0]
+    elif args.cache:
+        graph = load_cache(args.cache)
+        map_name = os.path.splitext(os.path.basename(args.cache))[0]
+    elif args.nodes or args.edges:
+        parser.error("--nodes and --edges must be given together")
+
     root = tk.Tk()
-    app = RomaniaDFSTkinterApp(root)
+    app = RomaniaDFSTkinterApp(root, graph, map_name, args.landmarks, profile=bool(args.profile))
     root.mainloop()
+    if args.profile:
+        app.profiler.save_chrome_trace(args.profile)
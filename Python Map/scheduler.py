@@ -0,0 +1,122 @@
+import time
+
+# Most frames a late tick catches up on with search steps; beyond that the
+# backlog is dropped instead of stalling the UI
+MAX_CATCHUP = 30
+
+# Event-loop slice used while running to completion without rendering
+RUN_SLICE = 0.05
+
+
+class FrameScheduler:
+    """Drive a stepping function from the Tk event loop at a fixed frame rate
+
+    Every frame runs steps_per_frame steps and renders once, so the search
+    advances at steps_per_frame * fps steps per second regardless of how long
+    a render takes.  When rendering falls behind, the next tick runs the
+    steps of every frame it missed and renders only the latest one (the
+    others are counted as dropped).  With steps_per_frame = None the search
+    runs to completion in short slices that keep the window responsive and
+    only the final frame is rendered.
+
+    step() returns False once there is nothing left to do; render() draws
+    the current state.  Only one tick is ever pending, so slow frames cannot
+    pile callbacks up on the Tk queue.  With an enabled profiler, the time
+    between a tick falling due and Tk running it is recorded as the
+    'tk latency' phase.
+    """
+
+    def __init__(self, root, step, render, steps_per_frame=1, fps=30, on_finish=None, profiler=None):
+        self.root = root
+        self.step = step
+        self.render = render
+        self.steps_per_frame = steps_per_frame
+        self.fps = fps
+        self.on_finish = on_finish
+        self.profiler = profiler
+        self.running = False
+        self._after_id = None
+        self._due = None
+        self._last = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the frame and step counters"""
+        self.steps = 0
+        self.frames = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+
+    def steps_per_second(self):
+        """Search steps run per wall-clock second since start()"""
+        elapsed = time.perf_counter() - self.started
+        return self.steps / elapsed if elapsed > 0 else 0.0
+
+    def start(self):
+        """Begin ticking; does nothing if already running"""
+        if self.running:
+            return
+        self.running = True
+        self._last = None
+        self.reset_stats()
+        self._schedule(0.0)
+
+    def stop(self):
+        """Stop ticking without rendering or calling on_finish"""
+        self.running = False
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self, delay):
+        self._due = time.perf_counter() + delay
+        self._after_id = self.root.after(int(delay * 1000), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        if not self.running:
+            return
+
+        now = time.perf_counter()
+        profiler = self.profiler
+        if profiler is not None and profiler.enabled and now > self._due:
+            profiler.add('tk latency', self._due, now)
+        interval = 1.0 / max(self.fps, 1e-3)
+        if self.steps_per_frame is None:
+            budget, frames_due = RUN_SLICE, 1
+        else:
+            frames_due = 1 if self._last is None else int((now - self._last) / interval)
+            frames_due = min(max(frames_due, 1), MAX_CATCHUP)
+            self.dropped += frames_due - 1
+            budget = interval * frames_due
+        self._last = now
+        deadline = now + budget
+
+        # Run this tick's steps, checking the clock every few steps
+        todo = None if self.steps_per_frame is None else self.steps_per_frame * frames_due
+        done = 0
+        alive = True
+        while todo is None or done < todo:
+            if not self.step():
+                alive = False
+                break
+            done += 1
+            if not done & 63 and time.perf_counter() > deadline:
+                break
+        self.steps += done
+
+        if not alive:
+            self.running = False
+            self.render()
+            self.frames += 1
+            if self.on_finish is not None:
+                self.on_finish()
+            return
+
+        if self.steps_per_frame is not None:
+            self.render()
+            self.frames += 1
+            delay = max(0.0, interval - (time.perf_counter() - now))
+        else:
+            delay = 0.001
+        self._schedule(delay)
@@ -0,0 +1,591 @@
+import math
+import time
+from array import array
+from heapq import heappop, heappush
+
+INF = math.inf
+
+
+class SearchBase:
+    """Common state and path handling of the step-by-step search engines
+
+    Engines work on integer node IDs and keep paths as parent pointers, so a
+    path is only rebuilt when path() or final_path() is called.  Every call
+    to step() is one visualization step; the attributes below describe the
+    state after it.  Pairs in different connected components are rejected
+    up front: the search is marked unreachable and completes without steps.
+    """
+
+    name = None
+
+    def __init__(self, graph, source, dest):
+        self.graph = graph
+        self.source = source
+        self.dest = dest
+
+        self.visited = bytearray(graph.num_nodes)
+        self.parent = array('l', [-1]) * graph.num_nodes
+
+        self.current = -1
+        self.current_parent = -1
+        self.last_expanded = False
+        self.found = False
+        self.completed = False
+        self.step_count = 0
+        self.visited_count = 0
+        self.elapsed = 0.0
+
+        self.unreachable = not graph.connected(source, dest)
+        if self.unreachable:
+            self.completed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.step():
+            raise StopIteration
+        return self.current
+
+    def frontier_size(self):
+        """Number of entries waiting to be popped"""
+        raise NotImplementedError
+
+    def step(self):
+        """Pop one frontier entry; returns False once the search is over"""
+        raise NotImplementedError
+
+    def last_pushed(self):
+        """Nodes pushed onto the frontier by the last step, if it expanded one"""
+        raise NotImplementedError
+
+    def last_reparented(self):
+        """Nodes other than the popped one whose parent the last step changed"""
+        return ()
+
+    def run(self):
+        """Step until the search finishes; returns True if a path was found"""
+        start = time.perf_counter()
+        while self.step():
+            pass
+        self.elapsed += time.perf_counter() - start
+        return self.found
+
+    def path(self):
+        """Rebuild the path to the most recently popped node"""
+        if self.current < 0:
+            return []
+        path = [self.current]
+        node = self.current_parent
+        while node >= 0:
+            path.append(node)
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def final_path(self):
+        """Path from source to destination, or [] if none was found"""
+        return self.path() if self.found else []
+
+    def distance(self):
+        """Length of the found path"""
+        return self.graph.path_distance(self.final_path())
+
+
+class DFSSearch(SearchBase):
+    """Depth-first search; returns the first path it reaches
+
+    A stack entry is just (node, parent) and every expanded node remembers
+    the node that pushed it.
+    """
+
+    name = 'DFS'
+
+    def __init__(self, graph, source, dest):
+        super().__init__(graph, source, dest)
+        self.stack_nodes = array('l', [source])
+        self.stack_parents = array('l', [-1])
+        self.push_start = 1
+
+    def frontier_size(self):
+        return len(self.stack_nodes)
+
+    def last_pushed(self):
+        return self.stack_nodes[self.push_start:]
+
+    def step(self):
+        if self.completed or not self.stack_nodes:
+            self.completed = True
+            return False
+
+        node = self.stack_nodes.pop()
+        self.current = node
+        self.current_parent = self.stack_parents.pop()
+        self.last_expanded = False
+        self.step_count += 1
+
+        # Check if destination reached
+        if node == self.dest:
+            self.found = True
+            self.completed = True
+            return True
+
+        # Process current node
+        if not self.visited[node]:
+            self.visited[node] = 1
+            self.visited_count += 1
+            self.parent[node] = self.current_parent
+            self.last_expanded = True
+            self.push_start = len(self.stack_nodes)
+
+            visited = self.visited
+            for neighbor in self.graph.neighbors(node):
+                if not visited[neighbor]:
+                    self.stack_nodes.append(neighbor)
+                    self.stack_parents.append(node)
+
+        return True
+
+
+class AStarSearch(SearchBase):
+    """A* over a binary heap; stale heap entries are skipped when popped
+
+    heuristic(u) must never overestimate the remaining distance to dest.
+    Entries whose f value exceeds bound, a known upper bound on the answer,
+    are never pushed.
+    """
+
+    name = 'A*'
+
+    def __init__(self, graph, source, dest, heuristic=None, bound=INF):
+        super().__init__(graph, source, dest)
+        self.heuristic = heuristic or euclidean_heuristic(graph, dest)
+        self.bound = bound
+        self.dist = array('d', [INF]) * graph.num_nodes
+        self.dist[source] = 0.0
+        self.heap = [(self.heuristic(source), 0.0, source)]
+
+    def frontier_size(self):
+        return len(self.heap)
+
+    def last_pushed(self):
+        # Only the node being expanded ever sets a parent pointer to itself
+        node, parent = self.current, self.parent
+        return [v for v in self.graph.neighbors(node) if parent[v] == node and not self.visited[v]]
+
+    def step(self):
+        if self.completed or not self.heap:
+            self.completed = True
+            return False
+
+        _, g, node = heappop(self.heap)
+        self.current = node
+        self.current_parent = self.parent[node]
+        self.last_expanded = False
+        self.step_count += 1
+
+        # The first time dest is popped its distance is final
+        if node == self.dest:
+            self.found = True
+            self.completed = True
+            return True
+
+        if self.visited[node]:
+            return True
+        self.visited[node] = 1
+        self.visited_count += 1
+        self.last_expanded = True
+
+        visited, dist, parent, heap, h = self.visited, self.dist, self.parent, self.heap, self.heuristic
+        bound = self.bound
+        for neighbor, weight in self.graph.edges(node):
+            if visited[neighbor]:
+                continue
+            new_g = g + weight
+            if new_g < dist[neighbor]:
+                f = new_g + h(neighbor)
+                if f > bound:
+                    continue
+                dist[neighbor] = new_g
+                parent[neighbor] = node
+                heappush(heap, (f, new_g, neighbor))
+
+        return True
+
+    def distance(self):
+        return self.dist[self.dest] if self.found else INF
+
+
+class DijkstraSearch(AStarSearch):
+    """Dijkstra's algorithm: A* without a heuristic"""
+
+    name = 'Dijkstra'
+
+    def __init__(self, graph, source, dest):
+        super().__init__(graph, source, dest, heuristic=lambda u: 0.0)
+
+
+class ALTSearch(AStarSearch):
+    """A* guided by landmark distance bounds (ALT)
+
+    The heuristic and an upper bound for pruning come from the triangle
+    inequality over precomputed landmark distances; see landmarks.py.
+    """
+
+    name = 'ALT'
+
+    def __init__(self, graph, source, dest, index=None):
+        index = index or graph.landmark_index
+        if index is None:
+            raise ValueError("ALT needs a landmark index, build one with landmarks.py")
+        super().__init__(graph, source, dest, heuristic=index.heuristic(dest),
+                         bound=index.upper_bound(source, dest))
+
+
+class BidirectionalAStarSearch(SearchBase):
+    """Bidirectional A* with average potentials
+
+    The forward search uses p(u) = (h_dest(u) - h_source(u)) / 2 and the
+    backward search -p(u); both are consistent, so the search can stop as
+    soon as the two smallest keys add up to the best meeting distance.
+    Each step pops from whichever side has the smaller key.
+    """
+
+    name = 'Bidirectional A*'
+
+    def __init__(self, graph, source, dest, heuristic_to_dest=None, heuristic_to_source=None):
+        super().__init__(graph, source, dest)
+        h_dest = heuristic_to_dest or euclidean_heuristic(graph, dest)
+        h_source = heuristic_to_source or euclidean_heuristic(graph, source)
+        self.potential = lambda u: (h_dest(u) - h_source(u)) / 2
+
+        n = graph.num_nodes
+        self.dist = (array('d', [INF]) * n, array('d', [INF]) * n)
+        self.parents = (self.parent, array('l', [-1]) * n)
+        self.settled = (bytearray(n), bytearray(n))
+        self.dist[0][source] = 0.0
+        self.dist[1][dest] = 0.0
+        self.heaps = ([(self.potential(source), 0.0, source)], [(-self.potential(dest), 0.0, dest)])
+
+        self.best = 0.0 if source == dest else INF
+        self.meeting = source if source == dest else -1
+        self.side = 0
+
+    def frontier_size(self):
+        return len(self.heaps[0]) + len(self.heaps[1])
+
+    def last_pushed(self):
+        node, parent, settled = self.current, self.parents[self.side], self.settled[self.side]
+        return [v for v in self.graph.neighbors(node) if parent[v] == node and not settled[v]]
+
+    def step(self):
+        if self.completed:
+            return False
+
+        heaps = self.heaps
+        top_f = heaps[0][0][0] if heaps[0] else INF
+        top_b = heaps[1][0][0] if heaps[1] else INF
+        if top_f + top_b >= self.best or top_f == INF or top_b == INF:
+            # Either the best meeting point is proven optimal or a side ran dry
+            self.completed = True
+            self.found = self.best < INF
+            if not self.found:
+                return False
+            self.step_count += 1
+            self.current = self.meeting
+            self.side = 0
+            self.last_expanded = False
+            return True
+
+        side = 0 if top_f <= top_b else 1
+        _, g, node = heappop(heaps[side])
+        self.side = side
+        self.current = node
+        self.current_parent = self.parents[side][node]
+        self.last_expanded = False
+        self.step_count += 1
+
+        settled = self.settled[side]
+        if settled[node]:
+            return True
+        settled[node] = 1
+        self.visited_count += 1
+        if not self.visited[node]:
+            self.visited[node] = 1
+            self.last_expanded = True
+
+        dist, other_dist = self.dist[side], self.dist[1 - side]
+        parent, heap = self.parents[side], heaps[side]
+        sign = 1 if side == 0 else -1
+        potential = self.potential
+        for neighbor, weight in self.graph.edges(node):
+            if settled[neighbor]:
+                continue
+            new_g = g + weight
+            if new_g < dist[neighbor]:
+                dist[neighbor] = new_g
+                parent[neighbor] = node
+                heappush(heap, (new_g + sign * potential(neighbor), new_g, neighbor))
+                through = new_g + other_dist[neighbor]
+                if through < self.best:
+                    self.best = through
+                    self.meeting = neighbor
+
+        return True
+
+    def chain(self, side, node):
+        """Nodes from node back to the root of one search tree"""
+        chain = []
+        parent = self.parents[side]
+        while node >= 0:
+            chain.append(node)
+            node = parent[node]
+        return chain
+
+    def path(self):
+        if self.current < 0:
+            return []
+        if self.found and self.current == self.meeting:
+            return self.final_path()
+        chain = self.chain(self.side, self.current)
+        # Forward paths read source -> node, backward ones node -> dest
+        return chain[::-1] if self.side == 0 else chain
+
+    def final_path(self):
+        if not self.found:
+            return []
+        return self.chain(0, self.meeting)[::-1] + self.chain(1, self.meeting)[1:]
+
+    def distance(self):
+        return self.best
+
+
+class LPAStarSearch(SearchBase):
+    """Lifelong Planning A*: an A* search that repairs itself after road edits
+
+    Every node has g, the distance it was last expanded with, and rhs, the
+    best distance its neighbors' g values offer (with the neighbor giving it
+    in parent).  Nodes where the two differ wait on the heap keyed by
+    (min(g, rhs) + h, min(g, rhs)); stale heap entries are skipped.  The
+    first run expands the same nodes as A*.  After road_changed(u, v) only
+    u and v are re-examined, and stepping on propagates the change through
+    the part of the search tree it affects instead of starting over.
+    repair_expanded and repair_touched count the expansions, and the
+    distinct nodes, since the last edit.  pushed and reparented list the
+    nodes queued and re-parented by the last step or road_changed() call.
+    """
+
+    name = 'LPA*'
+
+    def __init__(self, graph, source, dest):
+        super().__init__(graph, source, dest)
+        n = graph.num_nodes
+        self.scale = graph.heuristic_scale()
+        self.heuristic = euclidean_heuristic(graph, dest)
+        self.g = array('d', [INF]) * n
+        self.rhs = array('d', [INF]) * n
+        self.queued = bytearray(n)
+        self.queue_size = 0
+        self.heap = []
+        self.pushed = []
+        self.reparented = []
+        self.edits = 0
+        self.repair_expanded = 0
+        self.repair_touched = set()
+
+        self.rhs[source] = 0.0
+        self.update(source)
+
+    def frontier_size(self):
+        return self.queue_size
+
+    def last_pushed(self):
+        return self.pushed
+
+    def last_reparented(self):
+        return self.reparented
+
+    def key(self, u):
+        best = min(self.g[u], self.rhs[u])
+        return best + self.heuristic(u), best
+
+    def update(self, u):
+        """Queue u if g and rhs differ, otherwise take it off the queue"""
+        if self.g[u] != self.rhs[u]:
+            if not self.queued[u]:
+                self.queued[u] = 1
+                self.queue_size += 1
+                self.pushed.append(u)
+            k1, k2 = self.key(u)
+            heappush(self.heap, (k1, k2, u))
+        elif self.queued[u]:
+            self.queued[u] = 0
+            self.queue_size -= 1
+
+    def recompute(self, u):
+        """Set rhs and parent of u from its neighbors' g values"""
+        if u == self.source:
+            return
+        best, parent, g = INF, -1, self.g
+        for v, w in self.graph.edges(u):
+            if g[v] + w < best:
+                best, parent = g[v] + w, v
+        self.rhs[u] = best
+        if self.parent[u] != parent:
+            self.parent[u] = parent
+            self.reparented.append(u)
+        self.update(u)
+
+    def top_key(self):
+        """Smallest key still waiting, dropping stale heap entries"""
+        heap, queued = self.heap, self.queued
+        while heap:
+            k1, k2, u = heap[0]
+            if queued[u] and (k1, k2) == self.key(u):
+                return k1, k2
+            heappop(heap)
+        return INF, INF
+
+    def step(self):
+        if self.completed:
+            return False
+        self.pushed = []
+        self.reparented = []
+
+        dest, g, rhs, parent = self.dest, self.g, self.rhs, self.parent
+        if self.top_key() >= self.key(dest) and g[dest] == rhs[dest]:
+            # Nothing left on the heap can improve the distance to dest
+            self.completed = True
+            self.found = g[dest] < INF
+            if not self.found:
+                return False
+            self.step_count += 1
+            self.current = dest
+            self.current_parent = parent[dest]
+            self.last_expanded = False
+            return True
+
+        _, _, node = heappop(self.heap)
+        self.queued[node] = 0
+        self.queue_size -= 1
+        self.current = node
+        self.current_parent = parent[node]
+        self.step_count += 1
+        self.visited_count += 1
+        self.last_expanded = not self.visited[node]
+        self.visited[node] = 1
+        if self.edits:
+            self.repair_expanded += 1
+            self.repair_touched.add(node)
+
+        if g[node] > rhs[node]:
+            # Settle the node and offer its distance to the neighbors
+            g_node = g[node] = rhs[node]
+            source = self.source
+            reparented = self.reparented
+            for neighbor, weight in self.graph.edges(node):
+                if g_node + weight < rhs[neighbor] and neighbor != source:
+                    rhs[neighbor] = g_node + weight
+                    if parent[neighbor] != node:
+                        parent[neighbor] = node
+                        reparented.append(neighbor)
+                    self.update(neighbor)
+        else:
+            # Its distance went up: reopen it and every node that relied on it
+            g[node] = INF
+            self.update(node)
+            for neighbor in self.graph.neighbors(node):
+                if parent[neighbor] == node:
+                    self.recompute(neighbor)
+        return True
+
+    def road_changed(self, u, v):
+        """Take a closed, reopened or re-weighted road u - v into account
+
+        The search is marked as not completed; step it again (or run()) to
+        repair the answer.  last_pushed() and last_reparented() report what
+        the edit itself queued and re-parented, for SearchTrace.record_edit().
+        """
+        graph = self.graph
+        if graph.heuristic_scale() < self.scale:
+            # A shorter road made the heuristic too optimistic; re-key the queue
+            self.scale = graph.heuristic_scale()
+            self.heuristic = euclidean_heuristic(graph, self.dest)
+            for node in range(graph.num_nodes):
+                if self.queued[node]:
+                    heappush(self.heap, (*self.key(node), node))
+        # Only the two ends can have taken their rhs over this road
+        self.pushed = []
+        self.reparented = []
+        self.recompute(u)
+        self.recompute(v)
+
+        self.edits += 1
+        self.repair_expanded = 0
+        self.repair_touched = set()
+        self.unreachable = False
+        self.completed = False
+        self.found = False
+
+    def path(self):
+        """Path to the current node along the parent pointers
+
+        While a repair is under way the pointers can briefly form a loop;
+        the path is then cut where it would repeat a node.
+        """
+        if self.current < 0:
+            return []
+        path = [self.current]
+        seen = {self.current}
+        node = self.current_parent
+        while node >= 0 and node not in seen:
+            path.append(node)
+            seen.add(node)
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def distance(self):
+        return self.g[self.dest] if self.found else INF
+
+
+def euclidean_heuristic(graph, target):
+    """Straight-line distance to target, scaled so it never overestimates
+
+    Coordinates need not be in road units, so the straight-line distance is
+    multiplied by the smallest road-length / straight-line ratio of any road.
+    """
+    scale = graph.heuristic_scale()
+    xs, ys = graph.xs, graph.ys
+    tx, ty = xs[target], ys[target]
+    hypot = math.hypot
+    return lambda u: scale * hypot(xs[u] - tx, ys[u] - ty)
+
+
+ALGORITHMS = {
+    'dfs': DFSSearch,
+    'dijkstra': DijkstraSearch,
+    'astar': AStarSearch,
+    'bidirectional': BidirectionalAStarSearch,
+    'alt': ALTSearch,
+    'lpa': LPAStarSearch,
+}
+
+
+def available_algorithms(graph):
+    """Keys of the algorithms that can run on the given graph"""
+    return [key for key in ALGORITHMS if key != 'alt' or graph.landmark_index is not None]
+
+
+def check_algorithm(graph, algorithm):
+    """Raise ValueError unless the algorithm is known and can run on the graph"""
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    if algorithm not in available_algorithms(graph):
+        raise ValueError("ALT needs a landmark index, build one with landmarks.py")
+
+
+def make_search(algorithm, graph, source, dest):
+    """Create the search engine registered under the given key"""
+    check_algorithm(graph, algorithm)
+    return ALGORITHMS[algorithm](graph, source, dest)
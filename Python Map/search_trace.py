@@ -0,0 +1,409 @@
+import math
+import struct
+from array import array
+from bisect import bisect_left
+
+# Binary trace layout: TRACE_HEADER, the varint step records, the checkpoint
+# table (CHECKPOINT_FIELDS int64 values per checkpoint) and the final path
+# (int64 node IDs).  RTRACE01 traces, written before road edits were
+# recorded, have only the first five flags and still load.
+TRACE_MAGIC = b'RTRACE02'
+TRACE_MAGIC_V1 = b'RTRACE01'
+TRACE_HEADER = '<8s16sqqqqqqqqqqd'
+CHECKPOINT_FIELDS = 6
+
+# Flag bits stored in the low bits of each record's first varint
+SETTLED = 1      # the popped node was expanded; its pushes follow
+NEW_VISIT = 2    # first time the node was expanded by either search side
+BACKWARD = 4     # popped by the backward side of a bidirectional search
+FOUND = 8        # the step found the destination
+POPPED = 16      # a frontier entry was popped (not the final bidirectional step)
+FRONTIER = 32    # the frontier changed by more than pushes - pop; the difference follows
+REPARENTED = 64  # other nodes got a new parent; their count and (node, parent) pairs follow
+EDIT = 128       # a road edit u - v, not a step; its pushes follow
+FLAG_BITS = 8
+FLAG_BITS_V1 = 5
+
+
+def zigzag(n):
+    """Map a signed int to an unsigned one, small magnitudes to small values"""
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def write_varint(buf, value):
+    """Append an unsigned int as a little-endian base-128 varint"""
+    while value >= 0x80:
+        buf.append(value & 0x7F | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def read_varint(data, pos):
+    """Decode the varint at pos; returns (value, next position)"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class TraceState:
+    """Search state after one step of a recorded trace"""
+
+    __slots__ = ('step', 'current', 'current_parent', 'side', 'expanded', 'found',
+                 'visited', 'settled', 'frontier')
+
+    def __init__(self, step, current, current_parent, side, expanded, found, visited, settled, frontier):
+        self.step = step
+        self.current = current
+        self.current_parent = current_parent
+        self.side = side
+        self.expanded = expanded
+        self.found = found
+        self.visited = visited
+        self.settled = settled
+        self.frontier = frontier
+
+
+class SearchTrace:
+    """Compact record of every pop, push and visit of a search engine run
+
+    Each step is a few varints: the popped node as a zigzag delta from the
+    previous one with the step flags in its low bits, its parent as a delta
+    from the node, and for expanded nodes the number of pushes followed by
+    each pushed node as a delta.  On road graphs neighbouring IDs are close,
+    so a step costs a handful of bytes.  Engines that also drop queue
+    entries or re-parent other nodes (LPA*) add the frontier correction and
+    the changed parents to the step.  Every checkpoint_every steps, and after
+    every road edit, a checkpoint stores the byte offset and running
+    counters, so state_at() only decodes the records since the nearest
+    checkpoint.  The visited set and parent pointers behind visited_at() and
+    path_at() are decoded lazily, as far as any seek has needed; an undo log
+    of the parent changes lets a backward seek roll them back to the
+    checkpoint before it.
+
+    record() is called after every successful engine step, record_edit()
+    after every road_changed() and finish() once the engine is done; a trace
+    can be read while it is still recording.
+    """
+
+    def __init__(self, algorithm, num_nodes, source, dest, initial_frontier=1, checkpoint_every=256):
+        self.algorithm = algorithm
+        self.num_nodes = num_nodes
+        self.source = source
+        self.dest = dest
+        self.initial_frontier = initial_frontier
+        self.checkpoint_every = checkpoint_every
+        self.flag_bits = FLAG_BITS
+        self.records = bytearray()
+        self.checkpoints = array('q')
+        self.final_path = []
+        self.distance = math.nan
+        self.steps = 0
+        self.completed = False
+
+        # Running counters while recording
+        self._prev = source
+        self._visited = 0
+        self._settled = 0
+        self._frontier = initial_frontier
+        self._checkpoint_steps = array('q')
+        self._add_checkpoint()
+
+        # Lazily decoded visit order and per-side parent pointers, with an undo
+        # log of (record position, node * 2 + side, previous parent)
+        self._order = array('l')
+        self._parents = None
+        self._undo = array('q')
+        self._decoded_step = 0
+        self._decoded_pos = 0
+        self._decoded_prev = source
+
+    @classmethod
+    def for_search(cls, search, algorithm, checkpoint_every=256):
+        """Empty trace ready to record the given engine"""
+        return cls(algorithm, search.graph.num_nodes, search.source, search.dest,
+                   search.frontier_size(), checkpoint_every)
+
+    def __len__(self):
+        return self.steps
+
+    @property
+    def nbytes(self):
+        """Size of the saved trace in bytes"""
+        return (struct.calcsize(TRACE_HEADER) + len(self.records)
+                + 8 * len(self.checkpoints) + 8 * len(self.final_path))
+
+    def _add_checkpoint(self):
+        self.checkpoints.extend((len(self.records), self._visited, self._settled, self._frontier, self._prev,
+                                 self.steps))
+        self._checkpoint_steps.append(self.steps)
+
+    def _checkpoint_before(self, step):
+        """Fields of the last checkpoint taken before the given step was recorded"""
+        i = max(0, bisect_left(self._checkpoint_steps, step) - 1)
+        return self.checkpoints[i * CHECKPOINT_FIELDS:(i + 1) * CHECKPOINT_FIELDS]
+
+    # Recording
+
+    def _write(self, node, parent, flags, pushed, correction, reparented):
+        buf = self.records
+        flags |= (FRONTIER if correction else 0) | (REPARENTED if reparented else 0)
+        write_varint(buf, zigzag(node - self._prev) << FLAG_BITS | flags)
+        write_varint(buf, 0 if parent < 0 else zigzag(parent - node) + 1)
+        if flags & (SETTLED | EDIT):
+            write_varint(buf, len(pushed))
+            for v in pushed:
+                write_varint(buf, zigzag(v - node))
+        if correction:
+            write_varint(buf, zigzag(correction))
+        if reparented:
+            write_varint(buf, len(reparented))
+            for v, p in reparented:
+                write_varint(buf, zigzag(v - node))
+                write_varint(buf, 0 if p < 0 else zigzag(p - v) + 1)
+        self._prev = node
+
+    def record(self, search):
+        """Append the step the engine just took"""
+        settled = search.visited_count > self._settled
+        pushed = search.last_pushed() if settled else ()
+        frontier = search.frontier_size()
+        # Every step pops one entry, except the final step of a bidirectional search
+        popped = settled or self._frontier - frontier == 1
+        flags = (SETTLED if settled else 0) | (NEW_VISIT if search.last_expanded else 0) \
+            | (BACKWARD if getattr(search, 'side', 0) else 0) | (FOUND if search.found else 0) \
+            | (POPPED if popped else 0)
+        self._write(search.current, search.current_parent, flags, pushed,
+                    frontier - (self._frontier + len(pushed) - popped),
+                    [(v, search.parent[v]) for v in search.last_reparented()])
+        self._frontier = frontier
+
+        self._settled = search.visited_count
+        self._visited += 1 if search.last_expanded else 0
+        self.steps += 1
+        if self.steps % self.checkpoint_every == 0:
+            self._add_checkpoint()
+
+    def record_edit(self, search, u, v):
+        """Append the road edit u - v the engine just took into account
+
+        The edit is not a step: it is stored with the queue entries and
+        parents the engine changed, the recorded result no longer stands
+        and a checkpoint follows it.
+        """
+        pushed = search.last_pushed()
+        frontier = search.frontier_size()
+        self._write(u, v, EDIT, pushed, frontier - (self._frontier + len(pushed)),
+                    [(w, search.parent[w]) for w in search.last_reparented()])
+        self._frontier = frontier
+        self.completed = False
+        self._add_checkpoint()
+
+    def finish(self, search):
+        """Store the result once the engine has completed"""
+        self.completed = True
+        # An incremental engine can finish again after a road edit, with another answer
+        self.final_path = list(search.final_path()) if search.found else []
+        self.distance = float(search.distance()) if search.found else math.nan
+
+    # Reading
+
+    def _read_record(self, pos, prev, pushed=None):
+        """Decode the record at pos; returns (next position, node, parent,
+        flags, push count, frontier correction, re-parented (node, parent) pairs)
+
+        The pushed nodes are appended to the pushed list if one is given.
+        """
+        data, bits = self.records, self.flag_bits
+        tag, pos = read_varint(data, pos)
+        node = prev + unzigzag(tag >> bits)
+        flags = tag & ((1 << bits) - 1)
+        code, pos = read_varint(data, pos)
+        parent = node + unzigzag(code - 1) if code else -1
+        pushes = correction = 0
+        reparented = ()
+        if flags & (SETTLED | EDIT):
+            pushes, pos = read_varint(data, pos)
+            for _ in range(pushes):
+                delta, pos = read_varint(data, pos)
+                if pushed is not None:
+                    pushed.append(node + unzigzag(delta))
+        if flags & FRONTIER:
+            correction, pos = read_varint(data, pos)
+            correction = unzigzag(correction)
+        if flags & REPARENTED:
+            count, pos = read_varint(data, pos)
+            reparented = []
+            for _ in range(count):
+                delta, pos = read_varint(data, pos)
+                code, pos = read_varint(data, pos)
+                v = node + unzigzag(delta)
+                reparented.append((v, v + unzigzag(code - 1) if code else -1))
+        return pos, node, parent, flags, pushes, correction, reparented
+
+    def state_at(self, step):
+        """State after the given step (0 is before the first pop)"""
+        step = max(0, min(step, self.steps))
+        if step == 0:
+            return TraceState(0, -1, -1, 0, False, False, 0, 0, self.initial_frontier)
+
+        pos, visited, settled, frontier, prev, at = self._checkpoint_before(step)
+        while at < step:
+            pos, prev, parent, flags, pushes, correction, _ = self._read_record(pos, prev)
+            frontier += pushes + correction
+            if flags & EDIT:
+                continue
+            at += 1
+            visited += 1 if flags & NEW_VISIT else 0
+            settled += 1 if flags & SETTLED else 0
+            frontier -= 1 if flags & POPPED else 0
+        return TraceState(step, prev, parent, 1 if flags & BACKWARD else 0, bool(flags & NEW_VISIT),
+                          bool(flags & FOUND), visited, settled, frontier)
+
+    def _set_parent(self, pos, side, node, parent):
+        if self._parents[side] is None:
+            self._parents = (self._parents[0], array('l', [-1]) * self.num_nodes)
+        parents = self._parents[side]
+        self._undo.extend((pos, node * 2 + side, parents[node]))
+        parents[node] = parent
+
+    def _rewind(self, step):
+        """Roll the decoded state back to the last checkpoint before step"""
+        pos, visited, _, _, prev, at = self._checkpoint_before(step)
+        undo, parents = self._undo, self._parents
+        while undo and undo[-3] >= pos:
+            old, key = undo.pop(), undo.pop()
+            undo.pop()
+            parents[key & 1][key >> 1] = old
+        del self._order[visited:]
+        self._decoded_step, self._decoded_pos, self._decoded_prev = at, pos, prev
+
+    def _decode_to(self, step):
+        """Bring the decoded visit order and parent pointers to their state after step"""
+        if self._parents is None:
+            self._parents = (array('l', [-1]) * self.num_nodes, None)
+        if step < self._decoded_step:
+            self._rewind(step)
+        pos, prev = self._decoded_pos, self._decoded_prev
+        while self._decoded_step < step:
+            start = pos
+            pos, prev, parent, flags, _, _, reparented = self._read_record(pos, prev)
+            side = 1 if flags & BACKWARD else 0
+            if not flags & EDIT:
+                self._decoded_step += 1
+                if flags & NEW_VISIT:
+                    self._order.append(prev)
+                if flags & SETTLED:
+                    self._set_parent(start, side, prev, parent)
+            for node, node_parent in reparented:
+                self._set_parent(start, side, node, node_parent)
+        self._decoded_pos, self._decoded_prev = pos, prev
+
+    def visited_at(self, step):
+        """Nodes expanded by the given step, in visit order"""
+        state = self.state_at(step)
+        self._decode_to(state.step)
+        return self._order[:state.visited]
+
+    def path_at(self, step):
+        """Path to the node popped at the given step, as path() gave it live
+
+        Like LPAStarSearch.path(), the path is cut where the parent pointers
+        of a search under repair would loop back on it.
+        """
+        state = self.state_at(step)
+        if state.current < 0:
+            return []
+        if state.found and state.step == self.steps and self.final_path:
+            return list(self.final_path)
+        self._decode_to(state.step)
+        parents = self._parents[state.side]
+        chain = [state.current]
+        seen = {state.current}
+        node = state.current_parent
+        while node >= 0 and node not in seen:
+            chain.append(node)
+            seen.add(node)
+            node = parents[node] if parents is not None else -1
+        # Forward paths read source -> node, backward ones node -> dest
+        return chain[::-1] if state.side == 0 else chain
+
+    def events(self):
+        """Yield (step, kind, node) for every 'pop', 'visit', 'push' and 'edit' event
+
+        An edit is reported with the step it followed, as the node u of the
+        edited road u - v.
+        """
+        pos, prev, step = 0, self.source, 0
+        while pos < len(self.records):
+            pushed = []
+            pos, prev, _, flags, _, _, _ = self._read_record(pos, prev, pushed)
+            if flags & EDIT:
+                yield step, 'edit', prev
+            else:
+                step += 1
+                if flags & POPPED:
+                    yield step, 'pop', prev
+                if flags & NEW_VISIT:
+                    yield step, 'visit', prev
+            for node in pushed:
+                yield step, 'push', node
+
+    # Files
+
+    def save(self, path):
+        """Write the trace to a binary file"""
+        with open(path, 'wb') as f:
+            f.write(struct.pack(TRACE_HEADER, TRACE_MAGIC, self.algorithm.encode('ascii'), self.num_nodes,
+                                self.source, self.dest, self.steps, self.initial_frontier,
+                                self.checkpoint_every, len(self.checkpoints) // CHECKPOINT_FIELDS,
+                                len(self.records), len(self.final_path), int(self.completed), self.distance))
+            f.write(self.records)
+            f.write(self.checkpoints.tobytes())
+            f.write(array('q', self.final_path).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a trace written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = struct.calcsize(TRACE_HEADER)
+        (magic, algorithm, num_nodes, source, dest, steps, initial_frontier, checkpoint_every,
+         num_checkpoints, records_length, path_length, completed, distance) = struct.unpack_from(TRACE_HEADER, data)
+        if magic not in (TRACE_MAGIC, TRACE_MAGIC_V1):
+            raise ValueError(f"{path}: not a search trace")
+
+        trace = cls(algorithm.rstrip(b'\0').decode('ascii'), num_nodes, source, dest, initial_frontier,
+                    checkpoint_every)
+        trace.flag_bits = FLAG_BITS if magic == TRACE_MAGIC else FLAG_BITS_V1
+        trace.steps = steps
+        trace.completed = bool(completed)
+        trace.distance = distance
+        pos = size
+        trace.records = bytearray(data[pos:pos + records_length])
+        pos += records_length
+        trace.checkpoints = array('q')
+        trace.checkpoints.frombytes(data[pos:pos + 8 * CHECKPOINT_FIELDS * num_checkpoints])
+        pos += 8 * CHECKPOINT_FIELDS * num_checkpoints
+        trace._checkpoint_steps = trace.checkpoints[CHECKPOINT_FIELDS - 1::CHECKPOINT_FIELDS]
+        final_path = array('q')
+        final_path.frombytes(data[pos:pos + 8 * path_length])
+        trace.final_path = final_path.tolist()
+        return trace
+
+
+def record_search(search, algorithm, checkpoint_every=256):
+    """Run an engine to completion, returning its trace"""
+    trace = SearchTrace.for_search(search, algorithm, checkpoint_every)
+    while search.step():
+        trace.record(search)
+    trace.finish(search)
+    return trace
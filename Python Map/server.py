@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from batch import describe
+from map_loader import load_graph, open_graph
+from query_cache import QueryCache, result_from_search
+from search_engine import ALGORITHMS, check_algorithm, make_search
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+# Paths counted separately in the metrics; anything else counts as 'other'
+ENDPOINTS = ('/route', '/metrics', '/health')
+
+# How often the event loop's responsiveness is sampled, in seconds
+LAG_INTERVAL = 0.1
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# Graph of the current worker process, set up by _init_worker
+_graph = None
+
+
+def _init_worker(cache_path, landmarks_path):
+    global _graph
+    _graph = open_graph(cache_path, landmarks_path)
+
+
+def _search(source, dest, algorithm):
+    search = make_search(algorithm, _graph, source, dest)
+    search.run()
+    return result_from_search(search, algorithm)
+
+
+class LatencyHistogram:
+    """Latency histogram over fixed LATENCY_BUCKETS
+
+    counts[i] is the number of observations above the previous bound and at
+    most LATENCY_BUCKETS[i] ms; the last count holds everything slower.
+    Quantiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        i = 0
+        while i < len(self.buckets) and ms > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction q of the observations lie"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            'p50_ms': self.quantile(0.5), 'p95_ms': self.quantile(0.95), 'p99_ms': self.quantile(0.99),
+            'buckets': {f"le_{bound:g}": count for bound, count in zip(self.buckets, self.counts)},
+            'buckets_over': self.counts[-1],
+        }
+
+
+class RoutingService:
+    """Route queries over HTTP/JSON, searched in a worker pool behind a cache
+
+    Requests are parsed and answered on the asyncio event loop; anything
+    the QueryCache cannot answer goes to the executor with
+    run_in_executor(), so a long search never blocks other clients.  Equal
+    queries that arrive while one is being searched wait for that search
+    instead of starting their own.  Worker processes map the graph
+    themselves, like batch.py; with workers=0 searches run on one thread
+    in this process.
+
+    GET /route?from=A&to=B[&algorithm=astar] or POST /route with a JSON
+    {"from", "to", "algorithm"} object answers one query; GET /metrics
+    reports request counts, latency histograms, cache and pool state;
+    GET /health is a liveness check.
+    """
+
+    def __init__(self, graph, cache_path=None, landmarks_path=None, workers=None, algorithm='dfs',
+                 cache_bytes=64 * 1024 * 1024):
+        self.graph = graph
+        self.algorithm = algorithm
+        self.cache = QueryCache(graph, cache_bytes)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        initargs = (cache_path, landmarks_path)
+        if self.workers:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=initargs)
+        else:
+            self.executor = ThreadPoolExecutor(1, initializer=_init_worker, initargs=initargs)
+        self.pending = {}
+        self.started = time.time()
+        self.requests = {}
+        self.latency = {}
+        self.searches = 0
+        self.coalesced = 0
+        self.in_flight = 0
+        self.loop_lag = LatencyHistogram()
+        self.server = None
+        self._lag_task = None
+
+    # Queries
+
+    def parse_query(self, params):
+        """(source ID, dest ID, algorithm) from request parameters; raises ValueError"""
+        source, dest = params.get('from') or params.get('source'), params.get('to') or params.get('destination')
+        if not source or not dest:
+            raise ValueError("give both 'from' and 'to'")
+        algorithm = params.get('algorithm') or self.algorithm
+        # Before the cache, so a query is refused the same way whether or not it was cached
+        check_algorithm(self.graph, algorithm)
+        try:
+            return self.graph.node_id(source), self.graph.node_id(dest), algorithm
+        except KeyError as e:
+            raise ValueError(f"unknown node {e.args[0]!r}") from None
+
+    async def route(self, params):
+        """Answer one query; returns (outcome, result dict)"""
+        source, dest, algorithm = self.parse_query(params)
+        start = time.perf_counter()
+        answer = self.cache.lookup(source, dest, algorithm)
+        if answer is not None:
+            return 'cache', describe(self.graph, answer, time.perf_counter() - start)
+
+        key = (source, dest, algorithm)
+        future = self.pending.get(key)
+        if future is not None:
+            self.coalesced += 1
+            answer = await asyncio.shield(future)
+            return 'coalesced', describe(self.graph, answer.served_from_cache(), time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, _search, source, dest, algorithm)
+        self.pending[key] = future
+        self.searches += 1
+        self.in_flight += 1
+        try:
+            answer = await future
+        finally:
+            self.in_flight -= 1
+            del self.pending[key]
+        self.cache.store(answer)
+        return 'search', describe(self.graph, answer, time.perf_counter() - start)
+
+    def metrics(self):
+        uptime = time.time() - self.started
+        total = sum(self.requests.values())
+        return {
+            'uptime_s': round(uptime, 3),
+            'requests': total,
+            'requests_per_s': round(total / uptime, 3) if uptime > 0 else 0.0,
+            'requests_by_status': {f"{path} {status}": count
+                                   for (path, status), count in sorted(self.requests.items())},
+            'latency_ms': {name: histogram.to_dict() for name, histogram in sorted(self.latency.items())},
+            'event_loop_lag_ms': self.loop_lag.to_dict(),
+            'searches': self.searches,
+            'coalesced': self.coalesced,
+            'in_flight': self.in_flight,
+            'workers': self.workers,
+            'cache': self.cache.stats(),
+            'graph': {'nodes': self.graph.num_nodes, 'edges': self.graph.num_edges},
+        }
+
+    # HTTP
+
+    async def dispatch(self, method, target, body):
+        """(status, JSON-ready payload, latency label) for one request"""
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == '/route':
+            if method == 'POST':
+                try:
+                    data = json.loads(body or b'{}')
+                except ValueError:
+                    return 400, {'error': "body is not valid JSON"}, 'route error'
+                if not isinstance(data, dict):
+                    return 400, {'error': "body must be a JSON object"}, 'route error'
+                params.update({name: str(value) for name, value in data.items() if value is not None})
+            elif method != 'GET':
+                return 405, {'error': "use GET or POST"}, 'route error'
+            try:
+                outcome, result = await self.route(params)
+            except ValueError as e:
+                return 400, {'error': str(e)}, 'route error'
+            return 200, result, f"route {outcome}"
+        if method != 'GET':
+            return 405, {'error': "use GET"}, None
+        if url.path == '/metrics':
+            return 200, self.metrics(), 'metrics'
+        if url.path == '/health':
+            return 200, {'status': 'ok', 'nodes': self.graph.num_nodes}, 'health'
+        return 404, {'error': f"no such endpoint {url.path}"}, None
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one keep-alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              if version == 'HTTP/1.1' else headers.get('connection', '').lower() == 'keep-alive')
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {'error': f"body larger than {MAX_BODY} bytes"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload, label = await self.dispatch(method, target, body)
+                except Exception as e:
+                    status, payload, label = 500, {'error': f"{type(e).__name__}: {e}"}, 'error'
+                await self.respond(writer, status, payload, keep_alive)
+
+                path = urlsplit(target).path
+                path = path if path in ENDPOINTS else 'other'
+                self.requests[(path, status)] = self.requests.get((path, status), 0) + 1
+                if label is not None:
+                    histogram = self.latency.get(label)
+                    if histogram is None:
+                        histogram = self.latency[label] = LatencyHistogram()
+                    histogram.observe((time.perf_counter() - start) * 1000)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass    # shutting down with a search still running
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def watch_loop_lag(self):
+        """Record how late the event loop wakes up, a measure of its responsiveness"""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.loop_lag.observe(max(0.0, time.perf_counter() - start - LAG_INTERVAL) * 1000)
+
+    # Lifecycle
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self._lag_task = asyncio.create_task(self.watch_loop_lag())
+        return self.server
+
+    async def serve_forever(self, host='127.0.0.1', port=8080):
+        """Serve until SIGINT or SIGTERM"""
+        server = await self.start(host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass    # Windows: Ctrl+C still raises KeyboardInterrupt
+        async with server:
+            await stop.wait()
+
+    def close(self):
+        """Stop listening, drop queued searches and wait for the running ones"""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve route queries as JSON over HTTP")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on")
+    parser.add_argument('--cache', help="binary graph cache (default: the Romania map)")
+    parser.add_argument('--nodes', help="node file, used with --edges to build or refresh the cache")
+    parser.add_argument('--edges', help="edge file, used with --nodes")
+    parser.add_argument('--landmarks', help="landmark index directory, enables --algorithm alt")
+    parser.add_argument('-a', '--algorithm', choices=list(ALGORITHMS), default='dfs',
+                        help="algorithm of queries that do not name one")
+    parser.add_argument('--cache-mb', type=float, default=64, help="query cache size in MB")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="search processes (0: one thread in the server process)")
+    args = parser.parse_args(argv)
+
+    cache_path = args.cache
+    if args.nodes or args.edges:
+        if not (args.nodes and args.edges):
+            parser.error("--nodes and --edges must be given together")
+        if cache_path is None:
+            cache_path = os.path.splitext(args.edges)[0] + '.rmap'
+        load_graph(args.nodes, args.edges, cache_path)
+    if args.algorithm == 'alt' and not args.landmarks:
+        parser.error("--algorithm alt needs --landmarks")
+
+    graph = open_graph(cache_path, args.landmarks)
+    service = RoutingService(graph, cache_path, args.landmarks, args.workers, args.algorithm,
+                             int(args.cache_mb * 1024 * 1024))
+    print(f"serving {graph.num_nodes} nodes on http://{args.host}:{args.port} "
+          f"({args.workers} workers)", file=sys.stderr)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
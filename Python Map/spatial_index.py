@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+
+
+class GridIndex:
+    """Uniform grid over 2-D points for fast rectangle queries
+
+    Points are bucketed into square cells (about four points per cell) and
+    stored sorted by cell in row-major order, so the cells of one grid row
+    inside a query rectangle form a single contiguous slice.
+    """
+
+    def __init__(self, xs, ys, points_per_cell=4):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        n = len(self.xs)
+        if n:
+            self.x0, self.y0 = float(self.xs.min()), float(self.ys.min())
+            span = max(float(self.xs.max()) - self.x0, float(self.ys.max()) - self.y0, 1e-9)
+        else:
+            self.x0 = self.y0 = 0.0
+            span = 1.0
+        self.cols = max(1, int(math.sqrt(n / points_per_cell)))
+        self.cell = span / self.cols * (1 + 1e-9)
+
+        cells = self.cell_of(self.xs, self.ys)
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.cols * self.cols + 1))
+
+    def cell_of(self, xs, ys):
+        cx = np.clip(((xs - self.x0) / self.cell).astype(np.int64), 0, self.cols - 1)
+        cy = np.clip(((ys - self.y0) / self.cell).astype(np.int64), 0, self.cols - 1)
+        return cy * self.cols + cx
+
+    def query(self, x_min, x_max, y_min, y_max, exact=True):
+        """Indices of the points inside the rectangle
+
+        With exact=False the points of every overlapping cell are returned,
+        which may include a few just outside the rectangle.
+        """
+        c0 = max(0, int(math.floor((x_min - self.x0) / self.cell)))
+        c1 = min(self.cols - 1, int(math.floor((x_max - self.x0) / self.cell)))
+        r0 = max(0, int(math.floor((y_min - self.y0) / self.cell)))
+        r1 = min(self.cols - 1, int(math.floor((y_max - self.y0) / self.cell)))
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, dtype=np.int64)
+        if (c0, r0, c1, r1) == (0, 0, self.cols - 1, self.cols - 1):
+            found = self.order
+        else:
+            found = np.concatenate([self.order[self.starts[r * self.cols + c0]:self.starts[r * self.cols + c1 + 1]]
+                                    for r in range(r0, r1 + 1)])
+        if exact and len(found):
+            xs, ys = self.xs[found], self.ys[found]
+            found = found[(xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)]
+        return found
@@ -0,0 +1,33 @@
+import os
+
+import export
+
+
+def frames_in(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.png'))
+
+
+def test_png_writer_replaces_earlier_frames(tmp_path):
+    for i in range(19):
+        (tmp_path / f"frame_{i:05d}.png").write_bytes(b'stale')
+    (tmp_path / 'notes.txt').write_text('kept')
+
+    writer = export.PngDirectoryWriter(str(tmp_path), fps=4)
+    for _ in range(5):
+        writer.write((1, 1), b'new')
+    writer.close()
+
+    assert frames_in(tmp_path) == [f"frame_{i:05d}.png" for i in range(5)]
+    assert all((tmp_path / name).read_bytes() == b'new' for name in frames_in(tmp_path))
+    assert (tmp_path / 'notes.txt').read_text() == 'kept'
+
+
+def test_reexport_to_same_directory(tmp_path):
+    out = str(tmp_path / 'frames')
+    export.main(['Arad', 'Bucharest', '-o', out, '--dpi', '20', '-j', '1'])
+    first = frames_in(out)
+    export.main(['Arad', 'Bucharest', '-o', out, '--dpi', '20', '-j', '1', '--every', '1000'])
+    second = frames_in(out)
+
+    assert len(first) > 2
+    assert second == ['frame_00000.png', 'frame_00001.png']
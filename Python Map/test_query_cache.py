@@ -0,0 +1,84 @@
+import pytest
+
+from map_loader import open_graph
+from query_cache import ENTRY_OVERHEAD, CachedPath, QueryCache
+from search_engine import make_search
+
+
+@pytest.fixture
+def graph():
+    return open_graph(None)
+
+
+def ids(graph, *names):
+    return [graph.node_id(name) for name in names]
+
+
+def names(graph, path):
+    return [graph.names[u] for u in path]
+
+
+def test_closed_road_on_cached_path_drops_entry(graph):
+    cache = QueryCache(graph)
+    arad, bucharest = ids(graph, 'Arad', 'Bucharest')
+    assert 'Pitesti' in names(graph, cache.query(arad, bucharest, 'astar').path)
+
+    graph.close_road(*ids(graph, 'Pitesti', 'Bucharest'))
+    assert len(cache) == 0
+    assert cache.lookup(arad, bucharest, 'astar') is None
+
+
+def test_unrelated_closure_keeps_entry(graph):
+    cache = QueryCache(graph)
+    arad, bucharest = ids(graph, 'Arad', 'Bucharest')
+    path = cache.query(arad, bucharest, 'astar').path
+
+    graph.close_road(*ids(graph, 'Iasi', 'Neamt'))
+    assert list(cache.entries) == [(arad, bucharest, 'astar', graph.version)]
+    result = cache.lookup(arad, bucharest, 'astar')
+    assert result.from_cache and result.path == path
+
+
+@pytest.mark.parametrize('edit', ['shorten', 'reopen'])
+def test_edit_that_can_shorten_paths_clears_cache(graph, edit):
+    cache = QueryCache(graph)
+    iasi, neamt = ids(graph, 'Iasi', 'Neamt')
+    if edit == 'reopen':
+        graph.close_road(iasi, neamt)
+    cache.query(*ids(graph, 'Arad', 'Bucharest'), 'astar')
+    cache.query(*ids(graph, 'Arad', 'Bucharest'), 'dfs')
+
+    if edit == 'shorten':
+        graph.set_road_length(iasi, neamt, graph.edge_weight(iasi, neamt) - 1)
+    else:
+        graph.reopen_road(iasi, neamt)
+    assert len(cache) == 0
+    assert not cache.by_node
+
+
+@pytest.mark.parametrize('ends', [('Sibiu', 'Pitesti'), ('Pitesti', 'Sibiu')])
+def test_subpath_hit(graph, ends):
+    cache = QueryCache(graph)
+    cache.query(*ids(graph, 'Arad', 'Bucharest'), 'astar')
+    source, dest = ids(graph, *ends)
+
+    result = cache.query(source, dest, 'astar')
+    search = make_search('astar', graph, source, dest)
+    search.run()
+    assert result.from_cache and cache.subpath_hits == 1
+    assert (result.source, result.dest) == (source, dest)
+    assert result.path == search.final_path()
+    assert names(graph, result.path)[1] == 'Rimnicu Vilcea'
+    assert result.distance == search.distance()
+
+
+def test_lru_cap_evicts_oldest(graph):
+    cache = QueryCache(graph, max_bytes=2 * ENTRY_OVERHEAD)
+    for source in range(3):
+        if source == 2:
+            # Touch the first entry so the second becomes the oldest
+            assert cache.lookup(0, 10, 'dfs') is not None
+        cache.store(CachedPath(source, 10, 'dfs', False, [], None))
+
+    assert [key[0] for key in cache.entries] == [0, 2]
+    assert cache.bytes == 2 * ENTRY_OVERHEAD
@@ -0,0 +1,40 @@
+import random
+
+import benchmark
+from search_engine import make_search
+from search_trace import SearchTrace
+
+
+def test_lpa_trace_after_road_edit_seeks_back(tmp_path):
+    graph = benchmark.grid_graph(100, random.Random(0))
+    search = make_search('lpa', graph, 0, 99)
+    trace = SearchTrace.for_search(search, 'lpa', checkpoint_every=8)
+    live = []
+
+    def step():
+        if not search.step():
+            return False
+        trace.record(search)
+        live.append((search.path(), search.frontier_size()))
+        return True
+
+    for _ in range(25):
+        step()
+    # Close the last road of the current path: the repair briefly loops parents
+    u, v = search.path()[-2:]
+    graph.close_road(u, v)
+    search.road_changed(u, v)
+    trace.record_edit(search, u, v)
+    while step():
+        pass
+    trace.finish(search)
+    assert any(path[0] != 0 for path, _ in live)
+
+    trace.save(str(tmp_path / 'lpa.trace'))
+    for recorded in (trace, SearchTrace.load(str(tmp_path / 'lpa.trace'))):
+        # Last step first, so every other seek goes backwards
+        for step_number in range(len(live), 0, -1):
+            path, frontier = live[step_number - 1]
+            assert recorded.path_at(step_number) == path
+            assert recorded.state_at(step_number).frontier == frontier
+    assert trace.path_at(len(live)) == search.final_path()
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from map_loader import open_graph
+from query_cache import CachedPath
+from server import RoutingService
+
+
+@pytest.fixture
+def service():
+    service = RoutingService(open_graph(None), workers=0, algorithm='astar')
+    yield service
+    service.close()
+
+
+def get(service, target):
+    status, payload, _ = asyncio.run(service.dispatch('GET', target, b''))
+    return status, payload
+
+
+def test_route(service):
+    status, result = get(service, '/route?from=Arad&to=Bucharest')
+    assert status == 200
+    assert result['path'] == ['Arad', 'Sibiu', 'Rimnicu Vilcea', 'Pitesti', 'Bucharest']
+    assert result['distance'] == 418
+
+    status, result = get(service, '/route?from=Arad&to=Bucharest')
+    assert status == 200 and result['cached']
+
+
+def test_unavailable_algorithm_refused_whether_cached_or_not(service):
+    path = [service.graph.node_id(name) for name in ('Arad', 'Sibiu', 'Rimnicu Vilcea', 'Pitesti')]
+    assert get(service, '/route?from=Arad&to=Bucharest&algorithm=astar')[0] == 200
+    # An ALT answer in the cache must not be served while no landmark index is loaded
+    service.cache.store(CachedPath(path[0], path[-1], 'alt', True, path, 317.0))
+
+    for target in ('/route?from=Arad&to=Bucharest&algorithm=alt',     # A* path cached
+                   '/route?from=Arad&to=Pitesti&algorithm=alt',       # ALT path cached
+                   '/route?from=Iasi&to=Timisoara&algorithm=alt'):    # nothing cached
+        status, result = get(service, target)
+        assert status == 400
+        assert 'landmark index' in result['error']
+    assert service.searches == 1
+
+
+@pytest.mark.parametrize('target, status', [
+    ('/route?from=Arad&to=Nowhere', 400),
+    ('/route?from=Arad', 400),
+    ('/route?from=Arad&to=Sibiu&algorithm=bogus', 400),
+    ('/nope', 404),
+])
+def test_bad_requests(service, target, status):
+    assert get(service, target)[0] == status
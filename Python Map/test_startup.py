@@ -0,0 +1,11 @@
+import benchmark
+
+
+def test_headless_modules_never_import_the_gui_stack():
+    assert benchmark.check_headless_imports() == {}
+
+
+def test_gui_module_defers_matplotlib():
+    loaded = benchmark.fresh_import("import json, sys; import romaniamapdfs; print(json.dumps(sorted(sys.modules)))")
+    assert 'matplotlib' not in loaded
+    assert 'map_renderer' not in loaded